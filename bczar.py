@@ -20,70 +20,50 @@ from build.Context import Context
 # Factory method to create a commandline parser
 # returns an argparse.ArgumentParser
 #
-def create_parser ():
+# @param            registry            Registry of commands
+# @param            argv                Command-line arguments
+#
+def create_parser (registry, argv = None):
+    if argv is None:
+        argv = sys.argv[1:]
+
     # create the common parser
     parser = argparse.ArgumentParser ()
     Context.init_parser (parser)
 
     subparsers = parser.add_subparsers (help = 'sub-command help')
 
-    for command in get_commands ():
-        command.context.init_parser (subparsers)
+    # Only the commands that appear on the command-line are loaded. The
+    # other commands are listed using the help in the registry's index.
+    for name, help, loader in registry.get_commands ():
+        if name in argv:
+            loader ().context.init_parser (subparsers)
+        else:
+            subparsers.add_parser (name, help = help, add_help = False)
 
     return parser
 
 #
-# Dynamically import objects located on disk
-#
-# @param            path                Location of objects
-# @param            factory             Factory method to create object
-#
-def import_objects (prefix, imports, factory):
-    objects = []
-    
-    # Evaluate each of the installed pre-commit hooks.
-    
-    for name in os.listdir (os.path.join (prefix, imports)):
-      if name.endswith (".py") and name != '__init__.py':
-        # Helper method that extracts the modules name from the provided
-        # Python script name.
-        def get_module_basename (script):
-          return script[0:len (script) - 3]
-        
-        # Import the __create__ function for the project module.
-        module_basename = get_module_basename (name)
-        module_name = imports.replace ('/', '.') + '.' + module_basename
-        hook = __import__ (module_name, globals (), locals (), [factory])
-        
-        if factory in dir (hook):
-            eval_str = 'hook.%s ()' % factory
-            objects.append (eval (eval_str))
-        else:
-            logging.getLogger ().warning ('skipping {0}; {1} not defined'.format (module_name, factory))
-    
-    return objects
-
-#
-# Helper method that imports all the command objects
+# Helper method that gets all the command objects
 #
 def get_commands ():
-    script_path = os.path.dirname (sys.argv[0])       
-    return import_objects (script_path, 'build/commands', '__create__')
-    
+    from build.Registry import Registry
+    return [loader () for name, help, loader in Registry ().get_commands ()]
+
 #
-# Helper method that imports all the project objects
+# Helper method that gets all the project objects
 #
 def get_projects ():
-    script_path = os.path.dirname (sys.argv[0])       
-    return import_objects (script_path, 'build/projects', '__create__')
-    
+    from build.Registry import Registry
+    return Registry ().get_projects ()
+
 #
 # Main entry point for the application.
 #
 def main ():
-    # Check that python version is 3.0 or higher
-    if sys.version_info < (3,0):
-            print ("*** error: Python 3 is required")
+    # Check that python version is 3.7 or higher
+    if sys.version_info < (3,7):
+            print ("*** error: Python 3.7 or higher is required")
             sys.exit (1)
 
     # setup the logging format
@@ -91,7 +71,10 @@ def main ():
 
     try:
         # Parse the command-line arguments.
-        parser = create_parser ()
+        from build.Registry import Registry
+        registry = Registry ()
+
+        parser = create_parser (registry)
         the_opts = parser.parse_args ()
 
         # uncomment to see the options printed (e.g. 'Namespace(...)')
@@ -117,7 +100,7 @@ def main ():
         # will be based on those specified in the includes, and not specified
         # in the excludes section. For those project that are enabled, we
         # are going to add them to a workspace.
-        projects = get_projects ()
+        projects = registry.get_projects ()
         
         from build.Workspace import Workspace
         
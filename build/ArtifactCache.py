@@ -0,0 +1,440 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        ArtifactCache.py
+#
+# $Id$
+#
+################################################################################
+
+import os
+from os import path
+import sys
+import io
+import json
+import time
+import hashlib
+import logging
+import tarfile
+import platform
+import threading
+import subprocess
+
+#
+# Version of the archive format. Changing the format invalidates all
+# existing artifacts.
+#
+ARTIFACT_VERSION = 2
+
+#
+# Placeholder for the location of the prefix in relocated text files.
+#
+PREFIX_PLACEHOLDER = '@BCZAR_PREFIX@'
+
+#
+# Largest file that is checked for references to the prefix. Larger files
+# are assumed to be binaries.
+#
+RELOCATE_MAX_SIZE = 1024*1024
+
+#
+# Names of the compilers that are redirected to ccache.
+#
+CCACHE_COMPILERS = ['cc', 'c++', 'gcc', 'g++', 'clang', 'clang++']
+
+__compiler_version__ = {}
+
+#
+# Get the version of the compiler used for building, which is part of the
+# key of an artifact. On Windows, the version is part of the build type.
+#
+# @param[in]            env               Environment of the build
+#
+def compiler_version (env):
+  if sys.platform == 'win32':
+    return None
+
+  compiler = env.get ('CXX', 'c++')
+
+  if compiler not in __compiler_version__:
+    try:
+      output = subprocess.check_output ([compiler, '--version'], env = env, stderr = subprocess.STDOUT)
+      __compiler_version__[compiler] = output.decode ().splitlines ()[0].strip ()
+    except (OSError, subprocess.CalledProcessError, IndexError):
+      __compiler_version__[compiler] = 'unknown'
+
+  return __compiler_version__[compiler]
+
+#
+# @class ArtifactCache
+#
+# Cache of the install outputs of projects, e.g., lib, bin, and include.
+# After a project is built, its outputs are packed into a compressed archive
+# stored in a plain directory, which can be local or on a shared path. The
+# archive is keyed by the inputs of the build, so a project whose inputs
+# match an archive is restored from the cache instead of being built.
+#
+# Text files that reference the prefix, such as libtool and pkg-config
+# files, are rewritten when packed so the archive can be restored to any
+# prefix. Binaries that embed the prefix, such as executables with an
+# RPATH or MacOS X libraries with an install name, cannot be rewritten.
+# Their archive is only restored to the prefix it was built in.
+#
+class ArtifactCache:
+  #
+  # Initializing constructor
+  #
+  # @param[in]          cache_dir         Location of the cache
+  #
+  def __init__ (self, cache_dir):
+    self._cache_dir_ = path.join (path.abspath (cache_dir), 'artifacts')
+    self._lock_ = threading.Lock ()
+    self._stats_ = {'hits' : 0, 'misses' : 0, 'stored' : 0}
+
+  #
+  # Compute the key of the artifact for a project. The key is based on the
+  # fingerprint of the build inputs, the platform, and the compiler. None is
+  # returned if the project cannot be cached.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  # @param[in]          fingerprint       Fingerprint from BuildState
+  #
+  def key (self, proj, ctx, fingerprint):
+    if proj.get_artifacts (ctx) is None or fingerprint['revision'] is None:
+      return None
+
+    inputs = dict (fingerprint)
+    inputs.pop ('key', None)
+    inputs['version'] = ARTIFACT_VERSION
+    inputs['project'] = proj.name ()
+    inputs['platform'] = '%s-%s' % (sys.platform, platform.machine ())
+    inputs['compiler'] = compiler_version (ctx.env)
+
+    return hashlib.sha256 (json.dumps (inputs, sort_keys = True).encode ()).hexdigest ()
+
+  #
+  # Restore a project from the cache.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  # @param[in]          key               Key of the artifact
+  # @return             True if the project was restored
+  #
+  def restore (self, proj, ctx, key):
+    archive, metadata = self.__location (proj, key)
+
+    if not path.exists (metadata):
+      self.__count ('misses')
+      return False
+
+    try:
+      with open (metadata, 'r') as metadata_file:
+        info = json.load (metadata_file)
+
+      prefix = path.abspath (ctx.prefix)
+
+      if info.get ('prefix') is not None and info['prefix'] != prefix:
+        logging.getLogger ().info ('cannot restore {0}; its binaries reference {1}'.format (proj.name (), info['prefix']))
+        self.__count ('misses')
+        return False
+
+      with tarfile.open (archive, 'r:gz') as tar:
+        members = tar.getmembers ()
+
+        for member in members:
+          if path.isabs (member.name) or '..' in member.name.split ('/'):
+            raise ValueError ('unsafe path {0}'.format (member.name))
+
+        if hasattr (tarfile, 'data_filter'):
+          tar.extractall (prefix, members, filter = 'data')
+        else:
+          tar.extractall (prefix, members)
+
+      # Point the relocated files to this prefix.
+      for name in info.get ('relocated', []):
+        filename = path.join (prefix, name)
+
+        with open (filename, 'rb') as relocated:
+          content = relocated.read ()
+
+        with open (filename, 'wb') as relocated:
+          relocated.write (content.replace (PREFIX_PLACEHOLDER.encode (), prefix.encode ()))
+
+    except (OSError, ValueError, tarfile.TarError) as ex:
+      logging.getLogger ().warning ('cannot restore {0} from {1}: {2}'.format (proj.name (), archive, ex))
+      self.__count ('misses')
+      return False
+
+    logging.getLogger ().info ('restored {0} from the artifact cache'.format (proj.name ()))
+    self.__count ('hits')
+    return True
+
+  #
+  # Store the outputs of a project in the cache.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  # @param[in]          key               Key of the artifact
+  #
+  def store (self, proj, ctx, key):
+    archive, metadata = self.__location (proj, key)
+    prefix = path.abspath (ctx.prefix)
+
+    outputs = [output for output in proj.get_artifacts (ctx)
+                 if path.lexists (path.join (prefix, output))]
+
+    if len (outputs) == 0:
+      return
+
+    dirname = path.dirname (archive)
+
+    if not path.exists (dirname):
+      os.makedirs (dirname)
+
+    # Write to temporary files first so concurrent builds that share the
+    # cache never see a partial archive. The metadata is written last
+    # since its presence marks the artifact as complete.
+    tmpfile = '%s.%d.%d.tmp' % (archive, os.getpid (), threading.current_thread ().ident)
+    relocated = []
+    bound = []
+
+    try:
+      with tarfile.open (tmpfile, 'w:gz') as tar:
+        for output in outputs:
+          self.__add (tar, prefix, output, outputs, relocated, bound)
+
+      os.replace (tmpfile, archive)
+
+      info = {'project' : proj.name (),
+              'key' : key,
+              'created' : time.time (),
+              'outputs' : outputs,
+              'relocated' : relocated,
+              'prefix' : prefix if len (bound) > 0 else None,
+              'bound' : bound,
+              'size' : path.getsize (archive)}
+
+      with open (tmpfile, 'w') as metadata_file:
+        json.dump (info, metadata_file, indent = 2)
+
+      os.replace (tmpfile, metadata)
+
+    except (OSError, tarfile.TarError) as ex:
+      # The cache is only an optimization, so failing to store an
+      # artifact does not fail the build.
+      logging.getLogger ().warning ('cannot store {0} in the artifact cache: {1}'.format (proj.name (), ex))
+
+      if path.exists (tmpfile):
+        os.remove (tmpfile)
+
+      return
+
+    if len (bound) > 0:
+      logging.getLogger ().info ('{0} has {1} binary file(s) that reference {2}; '
+                                 'it can only be restored to this prefix'.format (proj.name (), len (bound), prefix))
+
+    logging.getLogger ().info ('stored {0} in the artifact cache'.format (proj.name ()))
+    self.__count ('stored')
+
+  #
+  # Log the hit rate of the cache.
+  #
+  def report (self):
+    with self._lock_:
+      hits = self._stats_['hits']
+      misses = self._stats_['misses']
+      stored = self._stats_['stored']
+
+    if hits + misses == 0:
+      return
+
+    logging.getLogger ().info ('artifact cache: {0} hit(s), {1} miss(es), {2} stored ({3:.0f}% hit rate)'.format (hits,
+                                                                                                                   misses,
+                                                                                                                   stored,
+                                                                                                                   hits * 100.0 / (hits + misses)))
+
+  #
+  # Add a file or directory to the archive. Symbolic links within the
+  # outputs are kept, and all others are replaced by the file they
+  # reference since the link may not be valid in another prefix.
+  #
+  def __add (self, tar, prefix, name, outputs, relocated, bound):
+    filename = path.join (prefix, name)
+    arcname = name.replace (os.sep, '/')
+
+    if path.islink (filename):
+      target = os.readlink (filename)
+      resolved = path.relpath (path.realpath (filename), prefix)
+
+      if not path.isabs (target) and any (self.__contains (output, resolved) for output in outputs):
+        tar.add (filename, arcname, recursive = False)
+        return
+
+      if not path.exists (filename):
+        return
+
+      filename = path.realpath (filename)
+
+    if path.isdir (filename):
+      tar.addfile (tar.gettarinfo (filename, arcname))
+
+      for child in sorted (os.listdir (filename)):
+        self.__add (tar, prefix, path.join (name, child), outputs, relocated, bound)
+
+    elif path.isfile (filename):
+      self.__add_file (tar, filename, arcname, relocated, bound, prefix, tar.gettarinfo (filename, arcname))
+
+  #
+  # Add a regular file to the archive, replacing references to the prefix
+  # in text files with a placeholder. Other files that reference the prefix
+  # are added to the bound files.
+  #
+  def __add_file (self, tar, filename, arcname, relocated, bound, prefix, info):
+    needle = prefix.encode ()
+
+    if info.size <= RELOCATE_MAX_SIZE:
+      with open (filename, 'rb') as source:
+        content = source.read ()
+
+      if needle in content:
+        if b'\0' not in content:
+          content = content.replace (needle, PREFIX_PLACEHOLDER.encode ())
+          info.size = len (content)
+
+          tar.addfile (info, io.BytesIO (content))
+          relocated.append (arcname)
+          return
+
+        bound.append (arcname)
+
+    elif self.__file_contains (filename, needle):
+      bound.append (arcname)
+
+    with open (filename, 'rb') as source:
+      tar.addfile (info, source)
+
+  #
+  # Test if a file contains a byte string, without reading the entire
+  # file into memory.
+  #
+  @staticmethod
+  def __file_contains (filename, needle):
+    overlap = b''
+
+    with open (filename, 'rb') as source:
+      for chunk in iter (lambda: source.read (RELOCATE_MAX_SIZE), b''):
+        if needle in overlap + chunk:
+          return True
+
+        overlap = chunk[-(len (needle) - 1):] if len (needle) > 1 else b''
+
+    return False
+
+  #
+  # Test if a path is within one of the outputs.
+  #
+  @staticmethod
+  def __contains (output, name):
+    output = path.normpath (output)
+    name = path.normpath (name)
+
+    return name == output or name.startswith (output + os.sep)
+
+  #
+  # Get the location of the archive and metadata for an artifact.
+  #
+  def __location (self, proj, key):
+    dirname = path.join (self._cache_dir_, proj.name ())
+    return (path.join (dirname, key + '.tar.gz'), path.join (dirname, key + '.json'))
+
+  #
+  # Increment one of the statistics of the cache.
+  #
+  def __count (self, stat):
+    with self._lock_:
+      self._stats_[stat] += 1
+
+#
+# Use ccache as the compiler launcher for the builds. A directory of links
+# named after the compilers is placed at the front of PATH, which makes
+# ccache intercept the compilers for make, bjam, and configure scripts
+# alike. False is returned if ccache is not available.
+#
+# @param[in]            env               Environment of the build
+# @param[in]            prefix            Location of the workspace
+#
+def enable_ccache (env, prefix):
+  import shutil
+
+  ccache = shutil.which ('ccache', path = env.get ('PATH'))
+
+  if ccache is None or sys.platform == 'win32':
+    logging.getLogger ().warning ('ccache is not available; compiling without it')
+    return False
+
+  prefix = path.abspath (prefix)
+  bindir = path.join (prefix, '.bczar', 'ccache')
+
+  if not path.exists (bindir):
+    os.makedirs (bindir)
+
+  for compiler in CCACHE_COMPILERS:
+    link = path.join (bindir, compiler)
+
+    if not path.lexists (link):
+      os.symlink (ccache, link)
+
+  env['PATH'] = os.pathsep.join ([bindir, env.get ('PATH', '')])
+
+  # Let ccache share results between prefixes.
+  env.setdefault ('CCACHE_BASEDIR', prefix)
+
+  logging.getLogger ().info ('compiling with {0}'.format (ccache))
+  return True
+
+#
+# Get the statistics of ccache. None is returned if the statistics are not
+# available.
+#
+# @param[in]            env               Environment of the build
+#
+def ccache_stats (env):
+  try:
+    output = subprocess.check_output (['ccache', '--print-stats'], env = env, stderr = subprocess.STDOUT)
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+  stats = {}
+
+  for line in output.decode ().splitlines ():
+    key, _, value = line.partition ('\t')
+
+    if value.strip ().isdigit ():
+      stats[key.strip ()] = int (value)
+
+  return stats
+
+#
+# Log the ccache hit rate between two sets of statistics.
+#
+# @param[in]            before            Statistics before the build
+# @param[in]            after             Statistics after the build
+#
+def report_ccache (before, after):
+  if before is None or after is None:
+    return
+
+  def delta (*keys):
+    return sum (after.get (key, 0) - before.get (key, 0) for key in keys)
+
+  hits = delta ('direct_cache_hit', 'preprocessed_cache_hit')
+  misses = delta ('cache_miss')
+
+  if hits + misses == 0:
+    return
+
+  logging.getLogger ().info ('ccache: {0} hit(s), {1} miss(es) ({2:.0f}% hit rate)'.format (hits,
+                                                                                           misses,
+                                                                                           hits * 100.0 / (hits + misses)))
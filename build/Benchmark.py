@@ -0,0 +1,465 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        Benchmark.py
+#
+# $Id$
+#
+################################################################################
+
+import os
+from os import path
+import io
+import sys
+import time
+import logging
+import tarfile
+import argparse
+import functools
+import threading
+import contextlib
+import subprocess
+
+from .Project import Project
+from .Context import Context
+from .Workspace import Workspace
+from . import Telemetry
+
+#
+# Shapes of the synthetic workspaces.
+#
+SHAPES = ['chain', 'fanout', 'diamond', 'bczar']
+
+#
+# Environment variables that change how the commands download and build.
+# They are removed while benchmarking so runs are reproducible.
+#
+BCZAR_VARIABLES = ['BCZAR_CACHE', 'BCZAR_MIRROR', 'BCZAR_ARTIFACTS']
+
+#
+# Build script for the synthetic projects. It sleeps and then burns CPU
+# for the requested number of seconds before installing a library.
+#
+BUILD_SCRIPT = """import os, sys, time
+
+name, sleep, cpu = sys.argv[1], float (sys.argv[2]), float (sys.argv[3])
+time.sleep (sleep)
+
+end = time.process_time () + cpu
+while time.process_time () < end:
+  pass
+
+os.makedirs ('lib', exist_ok = True)
+
+with open (os.path.join ('lib', 'lib%s.a' % name), 'w') as lib:
+  lib.write (name)
+"""
+
+#
+# @class SyntheticProject
+#
+# Project used for benchmarking. The project is downloaded from a local
+# bare Git repository, or from an archive served over HTTP, and its build
+# script takes a fixed amount of wall and CPU time.
+#
+class SyntheticProject (Project):
+  #
+  # Initializing constructor
+  #
+  # @param[in]          name              Name of the project
+  # @param[in]          depends           Names of the project's dependencies
+  # @param[in]          url               URL of the repository or archive
+  # @param[in]          archive           The url is an archive
+  # @param[in]          sleep             Seconds the build sleeps
+  # @param[in]          cpu               Seconds of CPU the build uses
+  #
+  def __init__ (self, name, depends, url, archive = False, sleep = 0.0, cpu = 0.0):
+    Project.__init__ (self, name)
+
+    self._depends_ = depends
+    self._url_ = url
+    self._archive_ = archive
+    self._sleep_ = sleep
+    self._cpu_ = cpu
+
+    if archive:
+      self.__location__ = '%s-1.0' % name
+    else:
+      self.__location__ = name
+
+  def get_depends (self):
+    return self._depends_
+
+  def get_repository (self, ctx):
+    if self._archive_:
+      return None
+
+    from .scm import Git
+    return (Git, self._url_)
+
+  def get_artifacts (self, ctx):
+    return [path.join (self.__location__, 'lib')]
+
+  def download (self, ctx):
+    abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+
+    if self._archive_:
+      if not path.exists (abspath):
+        from .Utilities import download_archive
+        download_archive (self._url_, path.abspath (ctx.prefix), ctx.cache_dir)
+    else:
+      scm, url = self.get_repository (ctx)
+      scm.checkout (url = url, location = abspath)
+
+  def validate_environment (self):
+    return True
+
+  def update_script (self, prefix, script):
+    abspath = path.abspath (path.join (prefix, self.__location__))
+
+    if path.exists (abspath):
+      location = path.join (script.get_this_variable (), self.__location__)
+
+      script.begin_section (self.name ())
+      script.write_env_variable ('%s_ROOT' % self.name ().upper (), location)
+      script.append_libpath_variable (path.join (location, 'lib'))
+
+  def build (self, ctx):
+    cmd = [sys.executable, 'build.py', self.name (), str (self._sleep_), str (self._cpu_)]
+    abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+
+    Telemetry.check_call (cmd, phase = 'make', cwd = abspath, env = ctx.env)
+
+  def clean (self, ctx):
+    import shutil
+    shutil.rmtree (path.join (ctx.prefix, self.__location__, 'lib'), ignore_errors = True)
+
+#
+# Get the dependency graph for a shape. The graph is a list of tuples of
+# (name, depends), where depends is a list of names.
+#
+# @param[in]            shape             Shape of the graph
+# @param[in]            count             Number of projects
+#
+def make_graph (shape, count):
+  count = max (count, 1)
+  names = ['P%03d' % i for i in range (count)]
+
+  if shape == 'chain':
+    # Each project depends on the one before it.
+    return [(name, names[i-1:i]) for i, name in enumerate (names)]
+
+  elif shape == 'fanout':
+    # Every project depends on the first project.
+    return [(names[0], [])] + [(name, [names[0]]) for name in names[1:]]
+
+  elif shape == 'diamond':
+    # A base project, a wide middle that depends on the base, and a
+    # top project that depends on the whole middle.
+    if count < 3:
+      return make_graph ('chain', count)
+
+    middle = names[1:-1]
+    return [(names[0], [])] + [(name, [names[0]]) for name in middle] + [(names[-1], middle)]
+
+  elif shape == 'bczar':
+    # The same graph as the real projects, e.g., CUTS -> DOC -> Boost.
+    from .Registry import Registry
+    return [(proj.name (), proj.get_depends ()) for proj in Registry ().get_projects ()]
+
+  raise ValueError ('unknown shape {0}'.format (shape))
+
+#
+# @class Fixture
+#
+# The repositories and archives for a synthetic workspace, and the local
+# HTTP server for the archives.
+#
+class Fixture:
+  #
+  # Initializing constructor
+  #
+  # @param[in]          work_dir          Location of the fixture
+  # @param[in]          graph             Dependency graph from make_graph
+  # @param[in]          archive_every     Every Nth project is an archive
+  # @param[in]          sleep             Seconds each build sleeps
+  # @param[in]          cpu               Seconds of CPU each build uses
+  #
+  def __init__ (self, work_dir, graph, archive_every = 3, sleep = 0.0, cpu = 0.0):
+    self._work_dir_ = path.abspath (work_dir)
+    self._graph_ = graph
+    self._archive_every_ = archive_every
+    self._sleep_ = sleep
+    self._cpu_ = cpu
+    self._server_ = None
+
+  #
+  # Create the repositories and archives, and start the HTTP server.
+  #
+  def __enter__ (self):
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+    archive_dir = path.join (self._work_dir_, 'archives')
+    os.makedirs (archive_dir, exist_ok = True)
+
+    class QuietHandler (SimpleHTTPRequestHandler):
+      def log_message (self, format, *args):
+        pass
+
+    handler = functools.partial (QuietHandler, directory = archive_dir)
+    self._server_ = ThreadingHTTPServer (('127.0.0.1', 0), handler)
+
+    thread = threading.Thread (target = self._server_.serve_forever)
+    thread.daemon = True
+    thread.start ()
+
+    self.projects = []
+
+    for i, (name, depends) in enumerate (self._graph_):
+      archive = self._archive_every_ > 0 and i % self._archive_every_ == self._archive_every_ - 1
+
+      if archive:
+        url = self.__make_archive (name, archive_dir)
+      else:
+        url = self.__make_repository (name)
+
+      self.projects.append (SyntheticProject (name, depends, url, archive, self._sleep_, self._cpu_))
+
+    return self
+
+  def __exit__ (self, type, value, traceback):
+    self._server_.shutdown ()
+    self._server_.server_close ()
+    return False
+
+  #
+  # Create a bare Git repository for a project. The commits use fixed
+  # dates so the repositories are the same for every run.
+  #
+  def __make_repository (self, name):
+    source = path.join (self._work_dir_, 'sources', name)
+    bare = path.join (self._work_dir_, 'repos', name + '.git')
+
+    if not path.exists (bare):
+      os.makedirs (source, exist_ok = True)
+
+      with open (path.join (source, 'build.py'), 'w') as script:
+        script.write (BUILD_SCRIPT)
+
+      env = dict (os.environ,
+                  GIT_AUTHOR_NAME = 'bczar', GIT_AUTHOR_EMAIL = 'bczar@localhost',
+                  GIT_COMMITTER_NAME = 'bczar', GIT_COMMITTER_EMAIL = 'bczar@localhost',
+                  GIT_AUTHOR_DATE = '2000-01-01T00:00:00Z', GIT_COMMITTER_DATE = '2000-01-01T00:00:00Z')
+
+      for cmd in [['git', 'init', '-q'],
+                  ['git', 'add', 'build.py'],
+                  ['git', 'commit', '-q', '-m', 'Initial version of {0}'.format (name)]]:
+        subprocess.check_call (cmd, cwd = source, env = env)
+
+      subprocess.check_call (['git', 'clone', '-q', '--bare', source, bare])
+
+    return 'file://' + bare
+
+  #
+  # Create the archive for a project.
+  #
+  def __make_archive (self, name, archive_dir):
+    basename = '%s-1.0' % name
+    filename = path.join (archive_dir, basename + '.tar.gz')
+
+    if not path.exists (filename):
+      content = BUILD_SCRIPT.encode ()
+      info = tarfile.TarInfo (basename + '/build.py')
+      info.size = len (content)
+      info.mtime = 946684800
+
+      with tarfile.open (filename, 'w:gz') as tar:
+        tar.addfile (info, io.BytesIO (content))
+
+    return 'http://%s:%d/%s.tar.gz' % (self._server_.server_address[0], self._server_.server_address[1], basename)
+
+#
+# Count the calls and time spent in a method of the Workspace.
+#
+@contextlib.contextmanager
+def profile_workspace (stats):
+  originals = {}
+
+  for method in ['order_projects', 'get_depends']:
+    originals[method] = getattr (Workspace, method)
+    stats[method] = {'calls' : 0, 'time' : 0.0}
+
+    def wrapper (self, *args, original = originals[method], method = method):
+      start = time.perf_counter ()
+
+      try:
+        return original (self, *args)
+      finally:
+        stats[method]['calls'] += 1
+        stats[method]['time'] += time.perf_counter () - start
+
+    setattr (Workspace, method, wrapper)
+
+  try:
+    yield stats
+  finally:
+    for method, original in originals.items ():
+      setattr (Workspace, method, original)
+
+#
+# Execute a command against a workspace, the same way bczar does. The
+# environment of the process is restored after the command.
+#
+# @param[in]            module_name       Module of the command
+# @param[in]            argv              Command-line arguments
+# @param[in]            projects          Projects in the workspace
+# @param[in]            verbose           Show the output of the command
+# @return               Dictionary of measurements
+#
+def run_command (module_name, argv, projects, verbose = False):
+  import importlib
+  command = importlib.import_module ('build.commands.' + module_name).__create__ ()
+
+  environ = dict (os.environ)
+  level = logging.getLogger ().level
+
+  try:
+    for variable in BCZAR_VARIABLES:
+      os.environ.pop (variable, None)
+
+    parser = argparse.ArgumentParser ()
+    Context.init_parser (parser)
+    command.context.init_parser (parser.add_subparsers ())
+
+    args = parser.parse_args (argv)
+    ctx = args.ctx (args)
+    ctx.workspace = Workspace (list (projects))
+
+    if not path.exists (ctx.prefix):
+      os.makedirs (ctx.prefix)
+
+    if not verbose:
+      logging.getLogger ().setLevel (logging.WARNING)
+
+    stats = {}
+    Telemetry.reset ()
+
+    with profile_workspace (stats):
+      output = io.StringIO ()
+
+      with contextlib.redirect_stdout (sys.stdout if verbose else output):
+        start = time.perf_counter ()
+        command.execute (ctx)
+        wall = time.perf_counter () - start
+
+  finally:
+    logging.getLogger ().setLevel (level)
+    os.environ.clear ()
+    os.environ.update (environ)
+
+  result = {'wall' : wall,
+            'order_projects' : stats['order_projects'],
+            'get_depends' : stats['get_depends']}
+
+  result.update (critical_path (Telemetry.get_phases (), projects, module_name == 'BuildCommand'))
+  return result
+
+#
+# Compute the critical path of a command from the time taken by each
+# project. For builds, the path follows the dependencies. Downloads do
+# not depend on each other, so the path is the slowest download.
+#
+# @param[in]            phases            Phases from the telemetry
+# @param[in]            projects          Projects in the workspace
+# @param[in]            use_depends       Follow the dependencies
+#
+def critical_path (phases, projects, use_depends):
+  costs = {}
+
+  for item in phases:
+    if item['depth'] == 0 and item['name'] in ('download', 'build', 'restore'):
+      costs[item['project']] = costs.get (item['project'], 0.0) + item['wall']
+
+  if len (costs) == 0:
+    return {'critical_path' : None, 'total_work' : 0.0}
+
+  finish = {}
+  depends = dict ((proj.name (), proj.get_depends ()) for proj in projects)
+
+  def finish_time (name):
+    if name not in finish:
+      before = 0.0
+
+      if use_depends:
+        before = max ([finish_time (d) for d in depends.get (name, []) if d in depends] or [0.0])
+
+      finish[name] = before + costs.get (name, 0.0)
+
+    return finish[name]
+
+  return {'critical_path' : max (finish_time (name) for name in depends),
+          'total_work' : sum (costs.values ())}
+
+#
+# Run the benchmark. Each repetition downloads, configures, and builds
+# a new sandbox, then builds it again to measure the cost of a build
+# where every project is up to date.
+#
+# @param[in]            work_dir          Location of the fixture and sandboxes
+# @param[in]            config            Dictionary of the benchmark options
+# @param[in]            verbose           Show the output of the commands
+# @return               Dictionary of results
+#
+def run_benchmark (work_dir, config, verbose = False):
+  graph = make_graph (config['shape'], config['projects'])
+  steps = [('download', 'DownloadCommand', ['download', '--jobs', str (config['jobs'])]),
+           ('genconfig', 'GenerateConfigCommand', ['genconfig']),
+           ('build', 'BuildCommand', ['build', '-P', str (config['parallel_projects']), '-t', str (config['threads'])]),
+           ('build (up to date)', 'BuildCommand', ['build', '-P', str (config['parallel_projects']), '-t', str (config['threads'])])]
+
+  results = dict ((name, []) for name, _, _ in steps)
+
+  with Fixture (work_dir, graph, config['archive_every'], config['sleep'], config['cpu']) as fixture:
+    for i in range (config['repeat']):
+      sandbox = path.join (path.abspath (work_dir), 'sandbox-%d' % i)
+
+      for name, module_name, argv in steps:
+        logging.getLogger ().info ('running {0} ({1} of {2})'.format (name, i + 1, config['repeat']))
+        result = run_command (module_name, ['--prefix', sandbox] + argv, fixture.projects, verbose)
+
+        if result['critical_path']:
+          result['efficiency'] = result['critical_path'] / result['wall']
+
+        results[name].append (result)
+
+  summary = []
+
+  for name, _, _ in steps:
+    runs = results[name]
+    walls = sorted (run['wall'] for run in runs)
+
+    summary.append ({'step' : name,
+                     'wall_median' : walls[len (walls) // 2],
+                     'wall_min' : walls[0],
+                     'runs' : runs})
+
+  return {'config' : config,
+          'graph' : graph,
+          'revision' : get_revision (),
+          'python' : sys.version.split ()[0],
+          'platform' : sys.platform,
+          'created' : time.time (),
+          'steps' : summary}
+
+#
+# Get the revision of bczar being benchmarked, if available.
+#
+def get_revision ():
+  try:
+    output = subprocess.check_output (['git', 'rev-parse', 'HEAD'],
+                                      cwd = path.dirname (path.abspath (__file__)),
+                                      stderr = subprocess.DEVNULL)
+    return output.decode ().strip ()
+  except (OSError, subprocess.CalledProcessError):
+    return None
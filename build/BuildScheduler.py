@@ -0,0 +1,167 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        BuildScheduler.py
+#
+# $Id$
+#
+################################################################################
+
+import logging
+from concurrent import futures
+
+#
+# @class BuildScheduler
+#
+# Scheduler that builds the projects in a workspace as a dependency graph
+# instead of one project at a time. A project is started as soon as all
+# of its dependencies have finished building.
+#
+# A build cannot be given more threads once it has started, so threads are
+# handed out by the remaining critical path of each project, i.e., the
+# cost of the project and its longest chain of dependents. The project on
+# the critical path gets the whole thread budget, and the others get a
+# share in proportion to their path. The total is allowed to exceed the
+# budget by OVERSUBSCRIPTION so the critical path does not starve the
+# projects building next to it.
+#
+class BuildScheduler:
+  #
+  # Factor by which the threads of the running builds may exceed the
+  # thread budget.
+  #
+  OVERSUBSCRIPTION = 2
+
+  #
+  # Initializing constructor
+  #
+  # @param[in]        workspace         Workspace of projects to build
+  # @param[in]        max_projects      Maximum number of concurrent builds
+  # @param[in]        threads           Total number of threads to share
+  # @param[in]        costs             Estimated build time of each project (optional)
+  #
+  def __init__ (self, workspace, max_projects, threads, costs = None):
+    self._workspace_ = workspace
+    self._max_projects_ = max (1, max_projects)
+    self._threads_ = max (1, threads)
+    self._costs_ = costs or {}
+
+  #
+  # Get the maximum number of projects that can build concurrently.
+  #
+  def max_concurrent (self):
+    return min (self._max_projects_, self._threads_ * self.OVERSUBSCRIPTION)
+
+  #
+  # Run the builder on every project in the workspace. The builder is
+  # invoked as builder (proj, threads) from a worker thread, where threads
+  # is the share of the thread budget given to the project. A project whose
+  # builder raises an exception is marked as failed, and its dependents are
+  # skipped. Projects on unrelated branches of the graph continue building.
+  #
+  # @param[in]        builder           Callable that builds a single project
+  # @return           Tuple of (failed, skipped) project names
+  #
+  def run (self, builder):
+    projects = self._workspace_.order_projects ()
+    names = [proj.name () for proj in projects]
+
+    # Only the dependencies that are part of the workspace matter. All
+    # others are assumed to be already built.
+    depends = {}
+    for proj in projects:
+      depends[proj.name ()] = [d for d in proj.get_depends () if d in names]
+
+    # Compute the remaining critical path of each project. The projects are
+    # in dependency order, so the dependents of a project are visited first.
+    # Projects without a recorded cost count as one unit.
+    dependents = dict ((name, []) for name in names)
+
+    for name in names:
+      for d in depends[name]:
+        dependents[d].append (name)
+
+    remaining = {}
+
+    for name in reversed (names):
+      cost = max (self._costs_.get (name, 1.0), 0.001)
+      remaining[name] = cost + max ([remaining.get (d, 0.0) for d in dependents[name]] or [0.0])
+
+    pending = list (projects)
+    done = []
+    failed = []
+    skipped = []
+    running = {}
+    available = self._threads_ * self.OVERSUBSCRIPTION
+
+    executor = futures.ThreadPoolExecutor (max_workers = self._max_projects_)
+
+    try:
+      while len (pending) > 0 or len (running) > 0:
+        # Skip the projects that depend on a project that did not build.
+        for proj in list (pending):
+          broken = [d for d in depends[proj.name ()] if d in failed or d in skipped]
+
+          if len (broken) > 0:
+            logging.getLogger ().error ('skipping {0}; {1} did not build'.format (proj.name (), ', '.join (broken)))
+            pending.remove (proj)
+            skipped.append (proj.name ())
+
+        # Start the projects whose dependencies have finished building, with
+        # the longest remaining critical path first.
+        ready = [proj for proj in pending
+                   if all (d in done for d in depends[proj.name ()])]
+
+        ready.sort (key = lambda x: remaining[x.name ()], reverse = True)
+
+        longest = max ([remaining[proj.name ()] for proj in pending] +
+                       [remaining[proj.name ()] for proj, _ in running.values ()] or [1.0])
+
+        slots = min (len (ready), self._max_projects_ - len (running))
+
+        for i in range (slots):
+          if available == 0:
+            break
+
+          proj = ready[i]
+          share = max (1, int (round (self._threads_ * remaining[proj.name ()] / longest)))
+          share = min (share, available)
+          available -= share
+
+          logging.getLogger ().info ('starting {0} with {1} thread(s)'.format (proj.name (), share))
+          future = executor.submit (builder, proj, share)
+
+          running[future] = (proj, share)
+          pending.remove (proj)
+
+        if len (running) == 0:
+          # Nothing is running, and nothing can be started. This only
+          # happens if the dependency graph has a cycle.
+          for proj in pending:
+            logging.getLogger ().error ('skipping {0}; unresolved dependencies'.format (proj.name ()))
+            skipped.append (proj.name ())
+
+          break
+
+        # Wait for at least one of the running builds to complete, then
+        # return its threads to the budget.
+        complete, _ = futures.wait (list (running.keys ()), return_when = futures.FIRST_COMPLETED)
+
+        for future in complete:
+          proj, share = running.pop (future)
+          available += share
+
+          ex = future.exception ()
+
+          if ex is None:
+            logging.getLogger ().info ('finished {0}'.format (proj.name ()))
+            done.append (proj.name ())
+          else:
+            logging.getLogger ().error ('failed to build {0}: {1}'.format (proj.name (), ex))
+            failed.append (proj.name ())
+
+    finally:
+      executor.shutdown ()
+
+    return (failed, skipped)
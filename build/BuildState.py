@@ -0,0 +1,230 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        BuildState.py
+#
+# $Id$
+#
+################################################################################
+
+import os
+from os import path
+import hashlib
+import json
+import logging
+import subprocess
+import threading
+
+#
+# Get the revision of the source files at the specified location. For Git
+# and Subversion sandboxes, the revision includes a digest of the local
+# modifications. For source files unpacked from an archive, the revision
+# is the name of the directory, which contains the version of the archive.
+# If the location does not exist, then None is returned.
+#
+# @param[in]            location          Location of the source files
+#
+def source_revision (location):
+  if not path.exists (location):
+    return None
+
+  try:
+    if path.exists (path.join (location, '.git')):
+      head = subprocess.check_output (['git', 'rev-parse', 'HEAD'], cwd = location)
+      submodules = subprocess.check_output (['git', 'submodule', 'status', '--recursive'], cwd = location)
+      changes = subprocess.check_output (['git', 'diff', 'HEAD'], cwd = location)
+
+      digest = hashlib.sha256 (submodules + changes).hexdigest ()
+      return 'git:%s:%s' % (head.decode ().strip (), digest)
+
+    elif path.exists (path.join (location, '.svn')):
+      version = subprocess.check_output (['svnversion', location])
+      changes = subprocess.check_output (['svn', 'diff', location])
+
+      digest = hashlib.sha256 (changes).hexdigest ()
+      return 'svn:%s:%s' % (version.decode ().strip (), digest)
+
+  except (OSError, subprocess.CalledProcessError) as ex:
+    logging.getLogger ().warning ('cannot determine revision of {0}: {1}'.format (location, ex))
+    return None
+
+  return 'dir:%s' % path.basename (path.normpath (location))
+
+#
+# @class BuildState
+#
+# Manifest of the projects built in a prefix. For each project, the manifest
+# records a fingerprint of the inputs used to build it: the source revision,
+# the features, the configuration, the build type, versioned namespace
+# support, and the fingerprints of its dependencies. A project does not need
+# to be rebuilt if its fingerprint has not changed since it was last built.
+#
+class BuildState:
+  # Fields of the fingerprint, and their description.
+  __fields__ = [('revision', 'source revision'),
+                ('features', 'features'),
+                ('config', 'configuration'),
+                ('build_type', 'build type'),
+                ('versioned_namespace', 'versioned namespace')]
+
+  #
+  # Initializing constructor
+  #
+  # @param[in]          prefix            Location of the workspace
+  #
+  def __init__ (self, prefix):
+    self._filename_ = path.join (prefix, '.bczar', 'build-state.json')
+    self._entries_ = {}
+    self._current_ = {}
+    self._lock_ = threading.Lock ()
+
+    if path.exists (self._filename_):
+      try:
+        with open (self._filename_, 'r') as manifest:
+          self._entries_ = json.load (manifest)
+      except ValueError:
+        logging.getLogger ().warning ('{0} is corrupt; rebuilding all projects'.format (self._filename_))
+
+  #
+  # Compute the fingerprint of the inputs for building a project.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  # @return             Dictionary object
+  #
+  def fingerprint (self, proj, ctx):
+    location = proj.get_location ()
+
+    if location is not None:
+      revision = source_revision (path.abspath (path.join (ctx.prefix, location)))
+    else:
+      revision = None
+
+    # Projects built in this run use their new fingerprint, and projects
+    # that were not use the fingerprint from when they were last built.
+    depends = {}
+
+    with self._lock_:
+      for name in proj.get_depends ():
+        if name in self._current_:
+          depends[name] = self._current_[name]
+        elif name in self._entries_:
+          depends[name] = self._entries_[name]['key']
+
+    inputs = {'revision' : revision,
+              'features' : proj.get_features (ctx),
+              'config' : ctx.config,
+              'build_type' : ctx.build_type,
+              'versioned_namespace' : ctx.versioned_namespace,
+              'depends' : depends}
+
+    inputs['key'] = hashlib.sha256 (json.dumps (inputs, sort_keys = True).encode ()).hexdigest ()
+    return inputs
+
+  #
+  # Check if a project needs to be built. An empty list is returned if
+  # the project is up to date. Otherwise, the list contains the reasons
+  # the project needs to be built.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  # @return             List of reasons
+  #
+  def check (self, proj, ctx):
+    current = self.fingerprint (proj, ctx)
+
+    with self._lock_:
+      previous = self._entries_.get (proj.name ())
+
+    if previous is None:
+      return ['not built before']
+
+    if current['revision'] is None:
+      return ['source revision unknown']
+
+    if current['key'] == previous['key']:
+      with self._lock_:
+        self._current_[proj.name ()] = current['key']
+
+      return []
+
+    reasons = []
+
+    for field, description in BuildState.__fields__:
+      if current[field] != previous.get (field):
+        reasons.append ('{0} changed'.format (description))
+
+    for name, key in sorted (current['depends'].items ()):
+      if key != previous.get ('depends', {}).get (name):
+        reasons.append ('dependency {0} changed'.format (name))
+
+    for name in sorted (previous.get ('depends', {}).keys ()):
+      if name not in current['depends']:
+        reasons.append ('dependency {0} removed'.format (name))
+
+    return reasons
+
+  #
+  # Record a project as successfully built. The fingerprint is computed
+  # after the build since building may touch the source files.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  #
+  def record (self, proj, ctx):
+    current = self.fingerprint (proj, ctx)
+
+    with self._lock_:
+      self._current_[proj.name ()] = current['key']
+
+      if current['revision'] is not None:
+        self._entries_[proj.name ()] = current
+      else:
+        self._entries_.pop (proj.name (), None)
+
+      self.__save ()
+
+  #
+  # Assume a project was built, without recording it in the manifest.
+  # Its dependents are then checked against its new fingerprint, e.g.,
+  # when reporting what a build would do.
+  #
+  # @param[in]          proj              Project object
+  # @param[in]          ctx               BuildContext object
+  #
+  def assume_built (self, proj, ctx):
+    current = self.fingerprint (proj, ctx)
+
+    with self._lock_:
+      self._current_[proj.name ()] = current['key']
+
+  #
+  # Remove a project from the manifest, e.g., after cleaning it.
+  #
+  # @param[in]          proj              Project object
+  #
+  def remove (self, proj):
+    with self._lock_:
+      self._current_.pop (proj.name (), None)
+
+      if self._entries_.pop (proj.name (), None) is not None:
+        self.__save ()
+
+  #
+  # Write the manifest to disk. The caller must hold the lock.
+  #
+  def __save (self):
+    dirname = path.dirname (self._filename_)
+
+    if not path.exists (dirname):
+      os.makedirs (dirname)
+
+    # Write to a temporary file first so an interrupted build does not
+    # leave behind a corrupt manifest.
+    tmpfile = self._filename_ + '.tmp'
+
+    with open (tmpfile, 'w') as manifest:
+      json.dump (self._entries_, manifest, indent = 2, sort_keys = True)
+
+    os.replace (tmpfile, self._filename_)
@@ -13,10 +13,41 @@
 import os
 from os import path
 
-import subprocess
+import re
 import sys
+import json
+import hashlib
 import logging
 
+from . import Telemetry
+
+#
+# Version of the workspace fingerprint. Changing the format regenerates
+# all workspaces.
+#
+FINGERPRINT_VERSION = 1
+
+#
+# Extensions of the files consumed by mwc.pl
+#
+MPC_EXTENSIONS = ('.mwc', '.mpc', '.mpb', '.mpt', '.features')
+
+#
+# Directories of the base projects, relative to an environment variable.
+#
+MPC_CONFIG_DIRS = [('MPC_ROOT', 'config'),
+                   ('ACE_ROOT', path.join ('bin', 'MakeProjectCreator', 'config')),
+                   ('TAO_ROOT', path.join ('MPC', 'config')),
+                   ('CIAO_ROOT', path.join ('MPC', 'config')),
+                   ('DANCE_ROOT', path.join ('MPC', 'config'))]
+
+#
+# Files that identify the version of MPC and ACE, relative to an
+# environment variable.
+#
+MPC_VERSION_FILES = [('MPC_ROOT', path.join ('modules', 'Version.pm')),
+                     ('ACE_ROOT', path.join ('ace', 'Version.h'))]
+
 #
 # @class MpcContext
 #
@@ -27,13 +58,14 @@ class MpcContext:
   #
   # Initalizing constructor
   #
-  def __init__ (self, workspace, type, config, threads, features = None, use_ace = False):
+  def __init__ (self, workspace, type, config, threads, features = None, use_ace = False, env = None):
     self.workspace = workspace
     self.type = type
     self.config = config
     self.threads = threads
     self.features = features
     self.use_ace = use_ace
+    self.env = env
 
 #
 # @class MpcWorkspace
@@ -51,21 +83,23 @@ class MpcWorkspace:
         self._threads_ = ctx.threads
         self._features_ = ctx.features
         self._use_ace_ = ctx.use_ace
+        self._env_ = ctx.env if ctx.env is not None else os.environ
 
     #
-    # Generate a MPC workspace for a build tool.
+    # Generate a MPC workspace for a build tool. The workspace is only
+    # generated if its inputs have changed since it was last generated,
+    # unless forced.
+    #
+    # @param[in]            force           Always generate the workspace
     #
-    def generate (self):
-        env = os.environ
+    def generate (self, force = False):
+        mwc_pl = self.get_mwc_pl ()
 
-        # Determine the location of mwc.pl
-        if self._use_ace_:
-            ACE_ROOT = env['ACE_ROOT']
-            mwc_pl = path.join (ACE_ROOT, 'bin', 'mwc.pl')
+        current = self.fingerprint ()
 
-        else:
-            MPC_ROOT = env['MPC_ROOT']
-            mwc_pl = path.join (MPC_ROOT, 'mwc.pl')
+        if not force and len (self.get_changes (current)) == 0:
+            logging.getLogger ().info ('{0} is up to date; not regenerating'.format (self._workspace_))
+            return
 
         # Construct the base command line.
         cmd = ['perl', '--', mwc_pl, '-type', self._type_, self._workspace_]
@@ -79,7 +113,251 @@ class MpcWorkspace:
 
         # Execute the workspace generator script
         dir = path.dirname (self._workspace_)
-        subprocess.check_call (cmd, cwd = dir)
+        Telemetry.check_call (cmd, phase = 'mwc', cwd = dir, env = self._env_)
+
+        self.save_fingerprint (current)
+
+    #
+    # Get the location of the workspace file.
+    #
+    def get_workspace (self):
+        return self._workspace_
+
+    #
+    # Get the location of mwc.pl
+    #
+    def get_mwc_pl (self):
+        if self._use_ace_:
+            return path.join (self._env_['ACE_ROOT'], 'bin', 'mwc.pl')
+        else:
+            return path.join (self._env_['MPC_ROOT'], 'mwc.pl')
+
+    #
+    # Get the location of the fingerprint of the generated workspace.
+    #
+    def get_fingerprint_file (self):
+        dirname, basename = path.split (self._workspace_)
+        return path.join (dirname, '.%s.fingerprint' % basename)
+
+    #
+    # Compute the fingerprint of the inputs for generating the workspace:
+    # the .mwc, .mpc, .mpb, .mpt, and .features files it consumes, the
+    # features, the type, and the version of MPC and ACE. The files are
+    # fingerprinted by their modification time and size so this is fast
+    # even for large workspaces.
+    #
+    # @return               Dictionary object
+    #
+    def fingerprint (self):
+        env = self._env_
+        workspace_dir = path.dirname (path.abspath (self._workspace_))
+
+        # The workspace directory and any directories the .mwc files
+        # reference, plus the directories of the base projects.
+        roots = [workspace_dir]
+        roots.extend (self.__referenced_dirs (path.abspath (self._workspace_), set ()))
+
+        for variable, subdir in MPC_CONFIG_DIRS:
+            if variable in env:
+                roots.append (path.join (env[variable], subdir))
+
+        files = {}
+        visited = set ()
+
+        for root in roots:
+            for dirpath, dirnames, filenames in os.walk (root):
+                real = path.realpath (dirpath)
+
+                if real in visited:
+                    dirnames[:] = []
+                    continue
+
+                visited.add (real)
+                dirnames[:] = sorted (d for d in dirnames if not d.startswith ('.'))
+
+                for filename in filenames:
+                    if path.splitext (filename)[1] not in MPC_EXTENSIONS:
+                        continue
+
+                    abspath = path.join (dirpath, filename)
+                    name = path.relpath (abspath, workspace_dir)
+
+                    try:
+                        if filename.endswith ('.features'):
+                            # The features files are small, and rewritten
+                            # by the projects, so use their content.
+                            with open (abspath, 'rb') as features_file:
+                                files[name] = hashlib.sha256 (features_file.read ()).hexdigest ()
+                        else:
+                            stat = os.stat (abspath)
+                            files[name] = [stat.st_mtime_ns, stat.st_size]
+
+                    except OSError:
+                        continue
+
+        # The version of MPC and ACE.
+        versions = {}
+
+        for variable, filename in MPC_VERSION_FILES:
+            if variable in env:
+                version_file = path.join (env[variable], filename)
+
+                if path.exists (version_file):
+                    with open (version_file, 'rb') as f:
+                        versions[version_file] = hashlib.sha256 (f.read ()).hexdigest ()
+
+        return {'version' : FINGERPRINT_VERSION,
+                'mwc_pl' : self.get_mwc_pl (),
+                'type' : self._type_,
+                'features' : self._features_,
+                'versions' : versions,
+                'files' : files}
+
+    #
+    # Get the changes to the inputs of the workspace since it was last
+    # generated. An empty list is returned if the workspace does not need
+    # to be generated. Otherwise, the list contains the reasons, including
+    # the sub-workspaces whose files have changed.
+    #
+    # @param[in]            current         Current fingerprint (optional)
+    # @return               List of reasons
+    #
+    def get_changes (self, current = None):
+        if current is None:
+            current = self.fingerprint ()
+
+        previous = None
+
+        try:
+            with open (self.get_fingerprint_file (), 'r') as fingerprint_file:
+                previous = json.load (fingerprint_file)
+        except (OSError, ValueError):
+            pass
+
+        if previous is None or previous.get ('version') != FINGERPRINT_VERSION:
+            return ['not generated before']
+
+        # Make sure the generated files still exist.
+        generated = self.get_generated_file ()
+
+        if generated is not None and not path.exists (generated):
+            return ['{0} is missing'.format (path.basename (generated))]
+
+        reasons = []
+
+        for field, description in [('mwc_pl', 'mwc.pl'),
+                                   ('type', 'type'),
+                                   ('features', 'features'),
+                                   ('versions', 'MPC/ACE version')]:
+            if current[field] != previous.get (field):
+                reasons.append ('{0} changed'.format (description))
+
+        # Group the changed files by the sub-workspace that contains them.
+        old = previous.get ('files', {})
+        new = current['files']
+        changed = [name for name in set (old.keys ()) | set (new.keys ()) if old.get (name) != new.get (name)]
+
+        mwc_dirs = set (path.dirname (name) for name in list (old.keys ()) + list (new.keys ()) if name.endswith ('.mwc'))
+        subworkspaces = {}
+
+        for name in changed:
+            dirname = path.dirname (name)
+
+            while dirname not in mwc_dirs and dirname not in ('', os.curdir) and not dirname.endswith (os.pardir):
+                dirname = path.dirname (dirname)
+
+            if dirname in mwc_dirs:
+                mwc_files = sorted (f for f in new if path.dirname (f) == dirname and f.endswith ('.mwc'))
+                key = ', '.join (mwc_files) or dirname
+            else:
+                key = path.basename (self._workspace_)
+
+            subworkspaces[key] = subworkspaces.get (key, 0) + 1
+
+        for key, count in sorted (subworkspaces.items ()):
+            reasons.append ('{0} changed ({1} file(s))'.format (key, count))
+
+        return reasons
+
+    #
+    # Save the fingerprint of the generated workspace.
+    #
+    # @param[in]            current         Fingerprint to save
+    #
+    def save_fingerprint (self, current):
+        filename = self.get_fingerprint_file ()
+        tmpfile = filename + '.tmp'
+
+        try:
+            with open (tmpfile, 'w') as fingerprint_file:
+                json.dump (current, fingerprint_file)
+
+            os.replace (tmpfile, filename)
+
+        except OSError as ex:
+            logging.getLogger ().warning ('cannot save {0}: {1}'.format (filename, ex))
+
+    #
+    # Get the main file generated for the workspace, or None if it is not
+    # known for the type.
+    #
+    def get_generated_file (self):
+        if self._type_.find ('vc') == 0:
+            return self._workspace_.replace ('.mwc', '.sln')
+        elif self._type_ == 'gnuace':
+            return path.join (path.dirname (self._workspace_), 'GNUmakefile')
+
+        return None
+
+    #
+    # Get the directories and workspaces referenced by a .mwc file that
+    # are outside of its directory. The .mwc file is scanned for paths,
+    # which is enough to find the inputs without fully parsing it.
+    #
+    def __referenced_dirs (self, mwc_file, seen):
+        if mwc_file in seen:
+            return []
+
+        seen.add (mwc_file)
+        dirname = path.dirname (mwc_file)
+        refs = []
+
+        try:
+            with open (mwc_file, 'r', errors = 'replace') as f:
+                content = f.read ()
+        except OSError:
+            return refs
+
+        for line in content.splitlines ():
+            line = line.split ('//')[0]
+
+            for token in line.replace ('{', ' ').replace ('}', ' ').split ():
+                if '=' in token or token.startswith ('-'):
+                    continue
+
+                token = re.sub (r'\$\((\w+)\)|\$(\w+)',
+                                lambda m: self._env_.get (m.group (1) or m.group (2), m.group (0)),
+                                token)
+                ref = path.normpath (path.join (dirname, token))
+
+                if path.isdir (ref):
+                    if not self.__is_within (ref, dirname):
+                        refs.append (ref)
+
+                elif ref.endswith ('.mwc') and path.isfile (ref):
+                    if not self.__is_within (ref, dirname):
+                        refs.append (path.dirname (ref))
+
+                    refs.extend (self.__referenced_dirs (ref, seen))
+
+        return refs
+
+    #
+    # Test if a path is within a directory.
+    #
+    @staticmethod
+    def __is_within (name, dirname):
+        return name == dirname or name.startswith (dirname + os.sep)
 
     #
     # Build the workspace.
@@ -113,7 +391,7 @@ class MpcWorkspace:
 
         # Execute the build command
         dir = path.dirname (self._workspace_)
-        subprocess.check_call (cmd, cwd = dir)
+        Telemetry.check_call (cmd, phase = 'make', cwd = dir, env = self._env_)
 
     #
     # Clean the generated workspace
@@ -150,22 +428,26 @@ class MpcWorkspace:
             sys.exit (1)
 
         # Execute the build command
-        subprocess.check_call (cmd, cwd = path.dirname (self._workspace_))
+        Telemetry.check_call (cmd, phase = 'clean', cwd = path.dirname (self._workspace_), env = self._env_)
         
     #
     # Generate the default features file. The features defined in
     # this file are based on the features provided when this object
-    # was created.
+    # was created. The file is only written if its content changes
+    # so its modification time does not trigger a rebuild.
     #
     # @param[in]            filename        Name of feature file (optional)
+    # @return               True if the file was written
     #
     def generate_default_feature_file (self, filename = 'default.features'):
-        feature_file = open (filename, 'w')
+        content = ''.join ('%s\n' % feature for feature in self._features_.split (','))
 
-        # Write each feature to the file.
-        for feature in self._features_.split (','):
-            feature_file.write ('%s\n' % feature)
+        if path.exists (filename):
+            with open (filename, 'r') as feature_file:
+                if feature_file.read () == content:
+                    return False
 
-        # Close the file for writing.
-        feature_file.close ()
+        with open (filename, 'w') as feature_file:
+            feature_file.write (content)
 
+        return True
@@ -39,6 +39,68 @@ class Project:
     def get_depends (self):
         return []
 
+    #
+    # Get the project's source code repository. The returned value is a
+    # tuple of the scm module (e.g., Git or Subversion) and the URL of the
+    # repository. If the project is not downloaded from a repository, then
+    # None is returned.
+    #
+    # @param            context         Context object containing the download
+    #                                   parameters
+    #
+    def get_repository (self, context):
+        return None
+
+    #
+    # Get the credentials for the project's source code repository. The
+    # returned value is a tuple of the username and password. If the
+    # repository does not require credentials, then None is returned.
+    #
+    # @param            context         Context object containing the download
+    #                                   parameters
+    #
+    def get_credentials (self, context):
+        return None
+
+    #
+    # Get the location of the project's source files, relative to the
+    # prefix. If the project does not define a location, then None is
+    # returned.
+    #
+    def get_location (self):
+        return getattr (self, '__location__', None)
+
+    #
+    # Get the features used to build the project. If the project is
+    # not built with features, then None is returned.
+    #
+    # @param            context         Context object for the build
+    #
+    def get_features (self, context):
+        return None
+
+    #
+    # Get the outputs of building the project, relative to the prefix.
+    # The outputs are stored in the artifact cache so the project can be
+    # restored instead of rebuilt. If the project cannot be restored from
+    # its outputs, then None is returned. Projects built in their source
+    # tree with MPC include the files generated there, e.g., the headers
+    # generated from IDL, since their dependents also need them.
+    #
+    # @param            context         Context object for the build
+    #
+    def get_artifacts (self, context):
+        return None
+
+    #
+    # Get the MPC workspace built by the project. If the project is not
+    # built with MPC, then None is returned.
+    #
+    # @param            context         Context object for the build
+    #
+    def get_mwc_workspace (self, context):
+        return None
+
     #
     # Validate the environment, ensuring that all the necessary environment
     # variables and binaries necessary for building are available.
@@ -0,0 +1,328 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        Registry.py
+#
+# $Id$
+#
+################################################################################
+
+import os
+import json
+import logging
+import threading
+
+#
+# Version of the index format. Changing the format invalidates all
+# existing indexes.
+#
+INDEX_VERSION = 1
+
+#
+# Entry point group for registering third-party projects. The entry point
+# must be a factory function that returns a Project object, similar to the
+# __create__ function of the projects in build/projects.
+#
+PROJECTS_ENTRY_POINT = 'bczar.projects'
+
+#
+# @class ProjectProxy
+#
+# Placeholder for a project whose module has not been imported. The name
+# and dependencies of the project are taken from the index. The module is
+# imported the first time any other part of the project is used.
+#
+class ProjectProxy:
+  #
+  # Initializing constructor
+  #
+  # @param[in]        loader            Function that creates the project
+  # @param[in]        name              Name of the project
+  # @param[in]        depends           Dependencies of the project
+  #
+  def __init__ (self, loader, name, depends):
+    self._loader_ = loader
+    self._name_ = name
+    self._depends_ = depends
+    self._project_ = None
+    self._lock_ = threading.Lock ()
+
+  #
+  # Get the project's name.
+  #
+  def name (self):
+    return self._name_
+
+  #
+  # Get the project's dependencies.
+  #
+  def get_depends (self):
+    return list (self._depends_)
+
+  #
+  # Get the actual project object, creating it if necessary.
+  #
+  def get_project (self):
+    with self._lock_:
+      if self._project_ is None:
+        logging.getLogger ().debug ('loading project {0}'.format (self._name_))
+        self._project_ = self._loader_ ()
+
+      return self._project_
+
+  def __getattr__ (self, attr):
+    return getattr (self.get_project (), attr)
+
+#
+# @class Registry
+#
+# Registry of the commands and projects known to bczar. Commands and
+# projects are discovered once, and their names, dependencies, and help
+# strings are cached in an index keyed by the modification time of each
+# module. A module is only imported when its command or project is used,
+# or when it has changed since the index was created.
+#
+class Registry:
+  #
+  # Initializing constructor
+  #
+  # @param[in]        index_filename    Location of the index (optional)
+  #
+  def __init__ (self, index_filename = None):
+    self._package_dir_ = os.path.dirname (os.path.abspath (__file__))
+
+    if index_filename is None:
+      index_filename = os.path.join (self._package_dir_, '.registry.json')
+
+    self._index_filename_ = index_filename
+    self._index_ = None
+    self._modified_ = False
+
+  #
+  # Get the projects in the registry. Each project is a proxy that only
+  # imports the project's module when it is actually used.
+  #
+  def get_projects (self):
+    projects = []
+
+    for module_name, entry in self.__get_entries ('projects', self.__describe_project):
+      def loader (module_name = module_name):
+        return Registry.__create (module_name)
+
+      projects.append (ProjectProxy (loader, entry['name'], entry['depends']))
+
+    for value, entry in self.__get_entry_points ():
+      def loader (value = value):
+        return Registry.__load_entry_point (value) ()
+
+      projects.append (ProjectProxy (loader, entry['name'], entry['depends']))
+
+    self.__save ()
+    return projects
+
+  #
+  # Get the commands in the registry. The returned list contains a tuple
+  # of (name, help, loader) for each command, where loader is a function
+  # that imports the command's module and creates the command.
+  #
+  def get_commands (self):
+    commands = []
+
+    for module_name, entry in self.__get_entries ('commands', self.__describe_command):
+      def loader (module_name = module_name):
+        return Registry.__create (module_name)
+
+      commands.append ((entry['name'], entry['help'], loader))
+
+    self.__save ()
+    return commands
+
+  #
+  # Get the entries of the modules in a package. The entry of a module
+  # is taken from the index, unless the module has changed. Otherwise,
+  # the module is imported and the entry is recreated.
+  #
+  # @param[in]        package           Name of the package
+  # @param[in]        describe          Function that creates an entry
+  #
+  def __get_entries (self, package, describe):
+    index = self.__load ()
+    cached = index.setdefault (package, {})
+
+    package_dir = os.path.join (self._package_dir_, package)
+    found = {}
+    entries = []
+
+    for filename in sorted (os.listdir (package_dir)):
+      if not filename.endswith ('.py') or filename == '__init__.py':
+        continue
+
+      stat = os.stat (os.path.join (package_dir, filename))
+      stamp = [stat.st_mtime, stat.st_size]
+      module_name = 'build.%s.%s' % (package, filename[:-3])
+
+      entry = cached.get (module_name)
+
+      if entry is None or entry.get ('stamp') != stamp:
+        try:
+          entry = describe (Registry.__create (module_name))
+        except AttributeError:
+          logging.getLogger ().warning ('skipping {0}; __create__ not defined'.format (module_name))
+          continue
+
+        entry['stamp'] = stamp
+        self._modified_ = True
+
+      found[module_name] = entry
+      entries.append ((module_name, entry))
+
+    if found != cached:
+      index[package] = found
+      self._modified_ = True
+
+    return entries
+
+  #
+  # Get the third-party projects registered via entry points. Scanning the
+  # installed distributions for entry points is slow, so the scan is only
+  # done when one of the directories on sys.path has changed, e.g., after
+  # a package is installed or removed.
+  #
+  def __get_entry_points (self):
+    import sys
+
+    # The location of bczar itself is skipped since sandboxes are often
+    # created there, which changes its modification time.
+    script_dir = os.path.dirname (self._package_dir_)
+    stamp = []
+
+    for dirname in sys.path:
+      if os.path.isdir (dirname) and os.path.abspath (dirname) != script_dir:
+        stamp.append ([dirname, os.stat (dirname).st_mtime])
+
+    index = self.__load ()
+    cached = index.get ('entry_points')
+
+    if cached is not None and cached.get ('stamp') == stamp:
+      return [(entry['value'], entry) for entry in cached['entries']]
+
+    try:
+      from importlib.metadata import entry_points
+    except ImportError:
+      return []
+
+    try:
+      eps = entry_points (group = PROJECTS_ENTRY_POINT)
+    except TypeError:
+      eps = entry_points ().get (PROJECTS_ENTRY_POINT, [])
+
+    entries = []
+
+    for ep in eps:
+      entry = self.__describe_project (ep.load () ())
+      entry['value'] = ep.value
+      entries.append (entry)
+
+    index['entry_points'] = {'stamp' : stamp, 'entries' : entries}
+    self._modified_ = True
+
+    return [(entry['value'], entry) for entry in entries]
+
+  #
+  # Create the index entry for a project.
+  #
+  def __describe_project (self, proj):
+    return {'name' : proj.name (),
+            'depends' : list (proj.get_depends ())}
+
+  #
+  # Create the index entry for a command. The help string is recorded
+  # by letting the command's context add itself to a recording parser.
+  #
+  def __describe_command (self, command):
+    import argparse
+
+    class Recorder:
+      def __init__ (self):
+        self.help = None
+
+      def add_parser (self, name, **kwargs):
+        self.help = kwargs.get ('help')
+        return argparse.ArgumentParser (prog = name)
+
+    recorder = Recorder ()
+    command.context.init_parser (recorder)
+
+    return {'name' : command.name (),
+            'help' : recorder.help}
+
+  #
+  # Import a module, and invoke its __create__ factory method.
+  #
+  # @param[in]        module_name       Fully qualified name of the module
+  #
+  @staticmethod
+  def __create (module_name):
+    import importlib
+    module = importlib.import_module (module_name)
+
+    return module.__create__ ()
+
+  #
+  # Load the object referenced by an entry point, e.g., package.module:attr
+  #
+  # @param[in]        value             Value of the entry point
+  #
+  @staticmethod
+  def __load_entry_point (value):
+    import importlib
+
+    module_name, _, attrs = value.partition (':')
+    obj = importlib.import_module (module_name.strip ())
+
+    for attr in attrs.strip ().split ('.'):
+      if attr:
+        obj = getattr (obj, attr)
+
+    return obj
+
+  #
+  # Load the index from disk. A missing or corrupt index is the same as
+  # an empty index.
+  #
+  def __load (self):
+    if self._index_ is None:
+      self._index_ = {'version' : INDEX_VERSION}
+
+      try:
+        with open (self._index_filename_, 'r') as index_file:
+          index = json.load (index_file)
+
+        if index.get ('version') == INDEX_VERSION:
+          self._index_ = index
+
+      except (OSError, ValueError):
+        pass
+
+    return self._index_
+
+  #
+  # Save the index to disk, if it has been modified. The index is only
+  # a cache, so failing to save it is not an error.
+  #
+  def __save (self):
+    if not self._modified_:
+      return
+
+    tmpfile = '%s.%d.tmp' % (self._index_filename_, os.getpid ())
+
+    try:
+      with open (tmpfile, 'w') as index_file:
+        json.dump (self._index_, index_file, indent = 2, sort_keys = True)
+
+      os.replace (tmpfile, self._index_filename_)
+      self._modified_ = False
+
+    except OSError as ex:
+      logging.getLogger ().debug ('cannot save {0}: {1}'.format (self._index_filename_, ex))
@@ -0,0 +1,316 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        Telemetry.py
+#
+# $Id$
+#
+################################################################################
+
+import os
+import sys
+import time
+import json
+import logging
+import threading
+import subprocess
+
+#
+# State of the telemetry for the running command. Each phase that has
+# completed is appended to the list of phases. The phases that are active
+# on a thread are kept in a stack local to that thread.
+#
+__state__ = {'start' : time.time (),
+             'phases' : [],
+             'threads' : {},
+             'lock' : threading.Lock ()}
+
+__local__ = threading.local ()
+
+#
+# @class Phase
+#
+# A timed phase of a command, such as the download of a project or the
+# configure step of its build. The phase records its wall time, and the
+# CPU time and peak memory of the child processes it executed.
+#
+class Phase:
+  #
+  # Initializing constructor
+  #
+  # @param[in]        name              Name of the phase
+  # @param[in]        project           Name of the project (optional)
+  #
+  def __init__ (self, name, project = None):
+    self.name = name
+    self.project = project
+    self.status = 'ok'
+    self.start = None
+    self.wall = 0.0
+    self.cpu_user = 0.0
+    self.cpu_system = 0.0
+    self.max_rss = 0
+    self.depth = 0
+
+  def __enter__ (self):
+    stack = get_stack ()
+
+    # Nested phases belong to the same project as their parent.
+    if self.project is None and len (stack) > 0:
+      self.project = stack[-1].project
+
+    self.depth = len (stack)
+    stack.append (self)
+
+    self.start = time.time ()
+    return self
+
+  def __exit__ (self, type, value, traceback):
+    self.wall = time.time () - self.start
+
+    if type is not None:
+      self.status = 'failed'
+
+    get_stack ().pop ()
+
+    with __state__['lock']:
+      threads = __state__['threads']
+      thread = threads.setdefault (threading.current_thread ().ident, len (threads))
+
+      __state__['phases'].append ({'name' : self.name,
+                                   'project' : self.project,
+                                   'status' : self.status,
+                                   'start' : self.start - __state__['start'],
+                                   'wall' : self.wall,
+                                   'cpu_user' : self.cpu_user,
+                                   'cpu_system' : self.cpu_system,
+                                   'max_rss' : self.max_rss,
+                                   'depth' : self.depth,
+                                   'thread' : thread})
+
+    return False
+
+  #
+  # Add the resource usage of a child process to the phase.
+  #
+  # @param[in]        rusage            Resource usage of the child process
+  #
+  def add_rusage (self, rusage):
+    self.cpu_user += rusage.ru_utime
+    self.cpu_system += rusage.ru_stime
+
+    # The peak memory is in kilobytes on Linux, and bytes on MacOS X.
+    max_rss = rusage.ru_maxrss
+
+    if sys.platform == 'darwin':
+      max_rss = max_rss // 1024
+
+    self.max_rss = max (self.max_rss, max_rss)
+
+#
+# Get the stack of active phases for the current thread.
+#
+def get_stack ():
+  if not hasattr (__local__, 'stack'):
+    __local__.stack = []
+
+  return __local__.stack
+
+#
+# Create a new phase. The phase is timed while it is active, e.g.:
+#
+#   with Telemetry.phase ('configure'):
+#     ...
+#
+# @param[in]          name              Name of the phase
+# @param[in]          project           Name of the project (optional)
+#
+def phase (name, project = None):
+  return Phase (name, project)
+
+#
+# Execute a command, and record its resource usage in the active phases.
+# The arguments are the same as subprocess.call ().
+#
+# @param[in]          cmd               Command to execute
+# @param[in]          phase             Name of a phase for the command (optional)
+# @return             Return code of the command
+#
+def call (cmd, phase = None, **kwargs):
+  if phase is not None:
+    with Phase (phase):
+      return call (cmd, **kwargs)
+
+  proc = subprocess.Popen (cmd, **kwargs)
+
+  if not hasattr (os, 'wait4'):
+    return proc.wait ()
+
+  # Reap the child ourselves so we get the resource usage of this child
+  # only, and not every child of the process.
+  try:
+    _, status, rusage = os.wait4 (proc.pid, 0)
+  except BaseException:
+    proc.kill ()
+    proc.wait ()
+    raise
+
+  if os.WIFSIGNALED (status):
+    proc.returncode = -os.WTERMSIG (status)
+  else:
+    proc.returncode = os.WEXITSTATUS (status)
+
+  for active in get_stack ():
+    active.add_rusage (rusage)
+
+  return proc.returncode
+
+#
+# Execute a command, and record its resource usage in the active phases.
+# The arguments are the same as subprocess.check_call ().
+#
+# @param[in]          cmd               Command to execute
+# @param[in]          phase             Name of a phase for the command (optional)
+#
+def check_call (cmd, phase = None, **kwargs):
+  retcode = call (cmd, phase, **kwargs)
+
+  if retcode != 0:
+    raise subprocess.CalledProcessError (retcode, cmd)
+
+  return 0
+
+#
+# Get the phases that have completed, in the order they completed.
+#
+def get_phases ():
+  with __state__['lock']:
+    return list (__state__['phases'])
+
+#
+# Discard the phases that have completed, and restart the clock. This
+# is used when several commands are executed by the same process.
+#
+def reset ():
+  with __state__['lock']:
+    __state__['start'] = time.time ()
+    __state__['phases'] = []
+    __state__['threads'] = {}
+
+#
+# Get the location of the telemetry for a prefix.
+#
+# @param[in]          prefix            Location of the workspace
+#
+def get_telemetry_dir (prefix):
+  return os.path.join (prefix, '.bczar', 'telemetry')
+
+#
+# Get the wall time of the most recent run of a phase for each project,
+# e.g., the time each project took to build. Only the newest runs of the
+# command are considered.
+#
+# @param[in]          prefix            Location of the workspace
+# @param[in]          command           Name of the command
+# @param[in]          name              Name of the phase
+# @param[in]          max_runs          Number of runs to consider
+# @return             Dictionary of project to wall time
+#
+def get_recorded_walls (prefix, command, name, max_runs = 20):
+  dirname = get_telemetry_dir (prefix)
+
+  if not os.path.isdir (dirname):
+    return {}
+
+  runs = sorted ([basename for basename in os.listdir (dirname)
+                    if basename.endswith ('-%s.json' % command)], reverse = True)
+
+  walls = {}
+
+  for basename in runs[:max_runs]:
+    try:
+      with open (os.path.join (dirname, basename), 'r') as json_file:
+        phases = json.load (json_file)['phases']
+    except (OSError, ValueError, KeyError):
+      continue
+
+    for item in phases:
+      if item['name'] == name and item['project'] is not None and item['status'] == 'ok':
+        walls.setdefault (item['project'], item['wall'])
+
+  return walls
+
+#
+# Save the telemetry of the command. The telemetry is written as JSON, and
+# in the Chrome trace event format, which can be loaded in chrome://tracing.
+#
+# @param[in]          prefix            Location of the workspace
+# @param[in]          command           Name of the command
+# @return             Location of the JSON file
+#
+def save (prefix, command):
+  with __state__['lock']:
+    phases = sorted (__state__['phases'], key = lambda x: (x['start'], x['depth']))
+    start = __state__['start']
+
+  run = {'command' : command,
+         'argv' : sys.argv,
+         'start' : start,
+         'wall' : time.time () - start,
+         'phases' : phases}
+
+  dirname = get_telemetry_dir (prefix)
+
+  if not os.path.exists (dirname):
+    os.makedirs (dirname)
+
+  # The name of the run is its start time, to the microsecond, so runs sort
+  # by when they started. If another process already used the name, then
+  # the time is incremented until the name is unique.
+  seconds = int (start)
+  micros = int ((start - seconds) * 1000000)
+
+  while True:
+    basename = '%s.%06d-%s' % (time.strftime ('%Y%m%d-%H%M%S', time.localtime (seconds)), micros, command)
+    filename = os.path.join (dirname, basename + '.json')
+
+    try:
+      json_file = open (filename, 'x')
+      break
+    except FileExistsError:
+      micros += 1
+
+      if micros == 1000000:
+        seconds += 1
+        micros = 0
+
+  with json_file:
+    json.dump (run, json_file, indent = 2)
+
+  # Write the trace. The timestamps and durations are in microseconds.
+  events = []
+
+  for item in phases:
+    if item['project'] is not None:
+      name = '%s: %s' % (item['project'], item['name'])
+    else:
+      name = item['name']
+
+    events.append ({'name' : name,
+                    'cat' : command,
+                    'ph' : 'X',
+                    'ts' : int (item['start'] * 1000000),
+                    'dur' : int (item['wall'] * 1000000),
+                    'pid' : 1,
+                    'tid' : item['thread'],
+                    'args' : {'status' : item['status'],
+                              'cpu_user' : item['cpu_user'],
+                              'cpu_system' : item['cpu_system'],
+                              'max_rss_kb' : item['max_rss']}})
+
+  with open (os.path.join (dirname, basename + '.trace.json'), 'w') as trace_file:
+    json.dump ({'traceEvents' : events, 'displayTimeUnit' : 'ms'}, trace_file)
+
+  logging.getLogger ().info ('telemetry saved to {0}'.format (filename))
+  return filename
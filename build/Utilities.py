@@ -61,24 +61,284 @@ def append_libpath_variable (value):
       os.environ['LD_LIBRARY_PATH'] = value
 
 #
-# Download a file from the internet.
+# Size of the chunks used when streaming a download to disk.
+#
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+#
+# Compute the SHA-256 digest of a file.
+#
+# @param[in]            filename        Name of the file
+#
+def file_sha256 (filename):
+  import hashlib
+
+  digest = hashlib.sha256 ()
+
+  with open (filename, 'rb') as local_file:
+    for chunk in iter (lambda: local_file.read (DOWNLOAD_CHUNK_SIZE), b''):
+      digest.update (chunk)
+
+  return digest.hexdigest ()
+
+#
+# @class FileLock
+#
+# Exclusive lock on a file that is shared by processes, and threads, e.g.:
+#
+#   with FileLock (filename + '.lock'):
+#     ...
+#
+# The lock file is removed when the lock is released so it is not left
+# next to the file it protects.
+#
+class FileLock:
+  #
+  # Initializing constructor
+  #
+  # @param[in]          filename        Name of the lock file
+  #
+  def __init__ (self, filename):
+    self.filename = filename
+    self.lock_file = None
+
+  def __enter__ (self):
+    while True:
+      lock_file = open (self.filename, 'a+b')
+
+      try:
+        if is_windows_platform ():
+          import msvcrt
+
+          # LK_LOCK gives up after 10 attempts, so keep trying until the
+          # lock is acquired.
+          lock_file.seek (0)
+
+          while True:
+            try:
+              msvcrt.locking (lock_file.fileno (), msvcrt.LK_LOCK, 1)
+              break
+            except OSError:
+              pass
+
+          break
+
+        import fcntl
+        fcntl.flock (lock_file.fileno (), fcntl.LOCK_EX)
+
+        # The previous owner may have removed the lock file while we were
+        # waiting, in which case the lock is on a file no one else sees.
+        try:
+          if os.path.samestat (os.stat (self.filename), os.fstat (lock_file.fileno ())):
+            break
+        except OSError:
+          pass
+
+      except BaseException:
+        lock_file.close ()
+        raise
+
+      lock_file.close ()
+
+    self.lock_file = lock_file
+    return self
+
+  def __exit__ (self, type, value, traceback):
+    if is_windows_platform ():
+      import msvcrt
+
+      self.lock_file.seek (0)
+      msvcrt.locking (self.lock_file.fileno (), msvcrt.LK_UNLCK, 1)
+      self.lock_file.close ()
+
+      # The file cannot be removed while another process has it open,
+      # in which case that process removes it.
+      try:
+        os.remove (self.filename)
+      except OSError:
+        pass
+
+    else:
+      # Remove the file while holding the lock, then close the file to
+      # release the lock.
+      try:
+        os.remove (self.filename)
+      except OSError:
+        pass
+
+      self.lock_file.close ()
+
+    return False
+
+#
+# Download a file from the internet. The file is streamed to disk in
+# chunks. If a partial download of the file exists from a previous
+# attempt, then the download is resumed where it left off. The target
+# is locked during the download so concurrent downloads of the same file
+# do not write to the same partial download.
+#
+# @param[in]            url             URL of file to download
+# @param[in]            target          Local filename
+# @param[in]            sha256          Expected SHA-256 of the file (optional)
+# @return               SHA-256 of the downloaded file
+#
+def download_url (url, target, sha256 = None):
+  with FileLock (target + '.lock'):
+    return download_url_locked (url, target, sha256)
+
+#
+# Download a file from the internet. This is the same as download_url (),
+# except the caller must hold the lock on the target.
 #
 # @param[in]            url             URL of file to download
 # @param[in]            target          Local filename
+# @param[in]            sha256          Expected SHA-256 of the file (optional)
+# @return               SHA-256 of the downloaded file
 #
-def download_url (url, target):
+def download_url_locked (url, target, sha256 = None):
   import urllib.request
-  
+  import urllib.error
+
+  partial = target + '.part'
+  offset = 0
+
+  if os.path.exists (partial):
+    offset = os.path.getsize (partial)
+
   logging.getLogger ().info ("downloading {0}".format (url))
-  webfile = urllib.request.urlopen (url)
-  
+  request = urllib.request.Request (url)
+
+  if offset > 0:
+    request.add_header ('Range', 'bytes=%d-' % offset)
+
+  try:
+    webfile = urllib.request.urlopen (request)
+
+  except urllib.error.HTTPError as ex:
+    if ex.code != 416:
+      raise
+
+    # The partial file is not usable for resuming the download so we
+    # need to start from the beginning.
+    os.remove (partial)
+    return download_url_locked (url, target, sha256)
+
+  # The server may not support ranges, in which case it sends the
+  # entire file again.
+  if offset > 0 and webfile.getcode () == 206:
+    logging.getLogger ().info ("resuming download at byte {0}".format (offset))
+    mode = 'ab'
+  else:
+    mode = 'wb'
+
   logging.getLogger ().info ("saving file to {0}".format (target))
-  local_file = open (target, 'wb')
-  local_file.write (webfile.read ())
-  
-  local_file.close ()
+
+  with open (partial, mode) as local_file:
+    for chunk in iter (lambda: webfile.read (DOWNLOAD_CHUNK_SIZE), b''):
+      local_file.write (chunk)
+
   webfile.close ()
 
+  digest = file_sha256 (partial)
+
+  if sha256 is not None and digest != sha256.lower ():
+    os.remove (partial)
+    raise Exception ('checksum mismatch for {0}: expected {1}, got {2}'.format (url, sha256, digest))
+
+  os.replace (partial, target)
+  return digest
+
+#
+# Get an archive from the download cache. If the archive is not in the
+# cache, or its content is corrupt, then it is downloaded. Archives with
+# a known SHA-256 are stored by their content so all prefixes share the
+# same copy. All other archives are stored by their URL, and the SHA-256
+# recorded on the first download is used to verify the cached copy.
+#
+# @param[in]            url             URL of the archive
+# @param[in]            cache_dir       Location of the download cache
+# @param[in]            sha256          Expected SHA-256 of the archive (optional)
+# @return               Location of the archive in the cache
+#
+def get_cached_archive (url, cache_dir, sha256 = None):
+  import hashlib
+  import posixpath
+  from urllib.parse import urlparse
+
+  if sha256 is not None:
+    key = 'sha256-' + sha256.lower ()
+  else:
+    key = 'url-' + hashlib.sha256 (url.encode ()).hexdigest ()
+
+  dirname = os.path.join (cache_dir, key)
+  filename = os.path.join (dirname, posixpath.basename (urlparse (url).path))
+
+  if not os.path.exists (dirname):
+    os.makedirs (dirname, exist_ok = True)
+
+  # Hold the lock while checking the cache so concurrent processes that
+  # need the same archive wait for the first download instead of repeating
+  # it.
+  with FileLock (filename + '.lock'):
+    return get_cached_archive_locked (url, filename, sha256)
+
+#
+# Get an archive from the download cache. This is the same as
+# get_cached_archive (), except the caller must hold the lock on the
+# archive.
+#
+# @param[in]            url             URL of the archive
+# @param[in]            filename        Location of the archive in the cache
+# @param[in]            sha256          Expected SHA-256 of the archive (optional)
+# @return               Location of the archive in the cache
+#
+def get_cached_archive_locked (url, filename, sha256 = None):
+  checksum_filename = filename + '.sha256'
+
+  if os.path.exists (filename):
+    expected = sha256
+
+    if expected is None and os.path.exists (checksum_filename):
+      with open (checksum_filename, 'r') as checksum_file:
+        expected = checksum_file.read ().strip ()
+
+    if expected is None or file_sha256 (filename) == expected.lower ():
+      logging.getLogger ().info ("using cached {0}".format (filename))
+      return filename
+
+    logging.getLogger ().warning ("{0} is corrupt; downloading again".format (filename))
+    os.remove (filename)
+
+  digest = download_url_locked (url, filename, sha256)
+
+  with open (checksum_filename, 'w') as checksum_file:
+    checksum_file.write (digest + '\n')
+
+  return filename
+
+#
+# Download an archive and unpackage it. If a download cache is provided,
+# then the archive is unpackaged directly from the cache and kept there
+# for the next download. Otherwise, the archive is downloaded to the
+# target location and removed after it is unpackaged.
+#
+# @param[in]            url             URL of the archive
+# @param[in]            path            Location to unpackage content
+# @param[in]            cache_dir       Location of the download cache (optional)
+# @param[in]            sha256          Expected SHA-256 of the archive (optional)
+#
+def download_archive (url, path, cache_dir = None, sha256 = None):
+  if cache_dir is not None:
+    archive = get_cached_archive (url, cache_dir, sha256)
+    unpackage_archive (archive, path)
+
+  else:
+    archive = os.path.join (path, url.split ('/')[-1])
+    download_url (url, archive, sha256)
+
+    unpackage_archive (archive, path)
+    os.remove (archive)
+
 #
 # Utility method for unpackaging an archive. This method can be used
 # with .zip, .tar.gz., and .tar files. It will automatically detect
@@ -0,0 +1,232 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        BenchCommand.py
+#
+# $Id$
+#
+################################################################################
+
+from ..Command import Command
+from ..Context import Context
+
+import os
+import json
+import time
+import logging
+
+#
+# Factory method for the command
+#
+def __create__ ():
+  return BenchCommand ()
+
+#
+# @class BenchContext
+#
+class BenchContext (Context):
+  @staticmethod
+  def init_parser (parser):
+    from ..Benchmark import SHAPES
+
+    bench_parser = parser.add_parser ('bench',
+                                      help = 'Benchmark the download, genconfig, and build commands on a synthetic workspace',
+                                      description = 'Benchmark the download, genconfig, and build commands on a synthetic workspace. '
+                                                    'The projects are downloaded from local Git repositories and a local HTTP server, '
+                                                    'and their builds take a fixed amount of time, so the results only depend on bczar.')
+
+    bench_parser.add_argument ('--shape',
+                               help = 'Shape of the dependency graph [default=diamond]',
+                               choices = SHAPES,
+                               default = 'diamond')
+
+    bench_parser.add_argument ('--projects', '-n',
+                               help = 'Number of projects in the workspace [default=10]',
+                               metavar = 'N',
+                               type = int,
+                               default = 10)
+
+    bench_parser.add_argument ('--sleep',
+                               help = 'Seconds each project takes to build [default=0.1]',
+                               metavar = 'SECONDS',
+                               type = float,
+                               default = 0.1)
+
+    bench_parser.add_argument ('--cpu',
+                               help = 'Seconds of CPU each project uses to build [default=0]',
+                               metavar = 'SECONDS',
+                               type = float,
+                               default = 0.0)
+
+    bench_parser.add_argument ('--archive-every',
+                               help = 'Download every Nth project as an archive instead of from Git, or 0 for none [default=3]',
+                               metavar = 'N',
+                               type = int,
+                               default = 3)
+
+    bench_parser.add_argument ('--repeat', '-r',
+                               help = 'Number of times to run each command [default=3]',
+                               metavar = 'N',
+                               type = int,
+                               default = 3)
+
+    bench_parser.add_argument ('--jobs', '-j',
+                               help = 'Number of projects to download concurrently [default=4]',
+                               metavar = 'N',
+                               type = int,
+                               default = 4)
+
+    bench_parser.add_argument ('--parallel-projects', '-P',
+                               help = 'Number of projects to build concurrently [default=1]',
+                               metavar = 'N',
+                               type = int,
+                               default = 1)
+
+    bench_parser.add_argument ('--threads', '-t',
+                               help = 'Number of threads to use when building [default=1]',
+                               metavar = 'N',
+                               type = int,
+                               default = 1)
+
+    bench_parser.add_argument ('--work-dir',
+                               help = 'Location of the repositories, archives, and sandboxes [default=temporary directory]',
+                               metavar = 'PATH',
+                               type = str)
+
+    bench_parser.add_argument ('--output', '-o',
+                               help = 'Location of the results [default=PREFIX/.bczar/bench/TIMESTAMP.json]',
+                               metavar = 'PATH',
+                               type = str)
+
+    bench_parser.add_argument ('--compare',
+                               help = 'Compare the results to an earlier run',
+                               metavar = 'PATH',
+                               type = str)
+
+    bench_parser.add_argument ('--verbose',
+                               help = 'Show the output of the commands',
+                               action = 'store_true')
+
+    bench_parser.set_defaults (cmd = BenchCommand)
+    bench_parser.set_defaults (ctx = BenchContext)
+
+  def __init__ (self, args):
+    Context.__init__ (self, args)
+    self.work_dir = args.work_dir
+    self.output = args.output
+    self.compare = args.compare
+    self.verbose = args.verbose
+
+    self.config = {'shape' : args.shape,
+                   'projects' : args.projects,
+                   'sleep' : args.sleep,
+                   'cpu' : args.cpu,
+                   'archive_every' : args.archive_every,
+                   'repeat' : max (1, args.repeat),
+                   'jobs' : args.jobs,
+                   'parallel_projects' : args.parallel_projects,
+                   'threads' : args.threads}
+
+#
+# @class BenchCommand
+#
+# Command that benchmarks the orchestration done by bczar, i.e., the
+# downloading, ordering, scheduling, and caching of projects, without
+# depending on the network or compiling the real projects.
+#
+class BenchCommand (Command):
+  context = BenchContext
+
+  #
+  # Get the command's name
+  #
+  def name (self):
+    return 'bench'
+
+  #
+  # Execute the command
+  #
+  def execute (self, ctx):
+    from ..Benchmark import run_benchmark
+
+    if ctx.work_dir is not None:
+      results = run_benchmark (ctx.work_dir, ctx.config, ctx.verbose)
+    else:
+      import tempfile
+
+      with tempfile.TemporaryDirectory (prefix = 'bczar-bench-') as work_dir:
+        results = run_benchmark (work_dir, ctx.config, ctx.verbose)
+
+    output = ctx.output
+
+    if output is None:
+      filename = time.strftime ('%Y%m%d-%H%M%S', time.localtime (results['created'])) + '.json'
+      output = os.path.join (ctx.prefix, '.bczar', 'bench', filename)
+
+    dirname = os.path.dirname (os.path.abspath (output))
+
+    if not os.path.exists (dirname):
+      os.makedirs (dirname)
+
+    with open (output, 'w') as results_file:
+      json.dump (results, results_file, indent = 2)
+
+    self.print_results (results)
+
+    if ctx.compare is not None:
+      with open (ctx.compare, 'r') as baseline_file:
+        self.print_comparison (json.load (baseline_file), results)
+
+    logging.getLogger ().info ('results saved to {0}'.format (output))
+
+  #
+  # Print the results of the benchmark.
+  #
+  def print_results (self, results):
+    config = results['config']
+
+    print ('')
+    print ('Benchmark: {0} projects, {1} shape, {2} run(s)'.format (len (results['graph']), config['shape'], config['repeat']))
+    print ('=' * 78)
+    print ('{0:<20} {1:>10} {2:>10} {3:>10} {4:>12} {5:>10}'.format ('step', 'wall', 'critical', 'efficiency', 'order_proj', 'get_deps'))
+
+    for step in results['steps']:
+      # Show the run with the median wall time.
+      runs = sorted (step['runs'], key = lambda x: x['wall'])
+      run = runs[len (runs) // 2]
+
+      if run['critical_path'] is not None:
+        critical = '{0:.2f}s'.format (run['critical_path'])
+        efficiency = '{0:.0f}%'.format (run['efficiency'] * 100.0)
+      else:
+        critical = '-'
+        efficiency = '-'
+
+      print ('{0:<20} {1:>9.2f}s {2:>10} {3:>10} {4:>11.1f}ms {5:>8.1f}ms'.format (step['step'],
+                                                                                 run['wall'],
+                                                                                 critical,
+                                                                                 efficiency,
+                                                                                 run['order_projects']['time'] * 1000.0,
+                                                                                 run['get_depends']['time'] * 1000.0))
+
+  #
+  # Print the change in the median wall time of each step.
+  #
+  def print_comparison (self, baseline, results):
+    print ('')
+    print ('Comparison to {0}'.format (baseline.get ('revision') or 'baseline'))
+    print ('=' * 78)
+    print ('{0:<20} {1:>10} {2:>10} {3:>20}'.format ('step', 'baseline', 'run', 'change'))
+
+    before = dict ((step['step'], step['wall_median']) for step in baseline['steps'])
+
+    for step in results['steps']:
+      old = before.get (step['step'])
+      new = step['wall_median']
+
+      if old is None:
+        print ('{0:<20} {1:>10} {2:>9.2f}s {3:>20}'.format (step['step'], '-', new, 'new'))
+      else:
+        change = '{0:+.2f}s ({1:+.1f}%)'.format (new - old, (new - old) * 100.0 / old if old > 0 else 0.0)
+        print ('{0:<20} {1:>9.2f}s {2:>9.2f}s {3:>20}'.format (step['step'], old, new, change))
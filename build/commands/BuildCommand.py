@@ -47,6 +47,34 @@ class BuildContext (Context):
                                type = str,
                                default = '1')
 
+    build_parser.add_argument ('--parallel-projects', '-P',
+                               help = 'Number of independent projects to build concurrently. The --threads budget is shared among them, favoring the critical path [default=1]',
+                               metavar = 'N',
+                               type = int,
+                               default = 1)
+
+    build_parser.add_argument ('--force', '-f',
+                               help = 'Build all projects, even the ones that are up to date',
+                               action = 'store_true')
+
+    build_parser.add_argument ('--explain',
+                               help = 'Explain why each project is built or skipped',
+                               action = 'store_true')
+
+    build_parser.add_argument ('--dry-run', '-n',
+                               help = 'Report the projects that would be built, and the MPC workspaces that would be regenerated, without building',
+                               action = 'store_true')
+
+    build_parser.add_argument ('--artifact-cache',
+                               help = 'Location of the cache of built projects, which are restored instead of rebuilt [default=$BCZAR_ARTIFACTS]',
+                               metavar = 'PATH',
+                               type = str,
+                               default = os.environ.get ('BCZAR_ARTIFACTS'))
+
+    build_parser.add_argument ('--ccache',
+                               help = 'Compile with ccache, if available',
+                               action = 'store_true')
+
     build_parser.add_argument ('--config', '-c',
                                help = 'Configuration to use to build the project (i.e. Debug, Release, etc).',
                                type = str,
@@ -60,7 +88,17 @@ class BuildContext (Context):
     self.versioned_namespace = args.versioned_namespace
     self.clean = args.clean
     self.threads = args.threads
+    self.parallel_projects = args.parallel_projects
     self.config = args.config
+    self.force = args.force
+    self.explain = args.explain
+    self.dry_run = args.dry_run
+    self.artifact_cache = args.artifact_cache
+    self.ccache = args.ccache
+
+    # Environment passed to the build tools. Each concurrent build is
+    # given its own copy of the environment.
+    self.env = os.environ
 
 #   
 # @class BuildCommand
@@ -80,6 +118,22 @@ class BuildCommand (Command):
   # Execute the command
   #
   def execute (self, ctx):
+    from .. import Telemetry
+
+    try:
+      self.run (ctx)
+    finally:
+      if not ctx.dry_run:
+        Telemetry.save (ctx.prefix, self.name ())
+
+  #
+  # Run the build, or clean, of the projects in the workspace.
+  #
+  # @param[in]          ctx           BuildContext object
+  #
+  def run (self, ctx):
+    from .. import Telemetry
+
     # First, configure the environment so the build does not fail
     # because of missing environment variables.
     configure_environment (ctx.prefix)
@@ -91,21 +145,180 @@ class BuildCommand (Command):
     # Validate build environment
     logging.getLogger ().info ('validating build environment')
     for proj in ctx.workspace.order_projects ():
-        if not proj.validate_environment ():
+        with Telemetry.phase ('validate', proj.name ()):
+            valid = proj.validate_environment ()
+
+        if not valid:
             sys.exit (1)
     
     if (ctx.versioned_namespace):
         logging.getLogger ().info ('building projects with versioned namespace support')
-        
+
+    # Load the state of the previous builds in this prefix.
+    from ..BuildState import BuildState
+    ctx.state = BuildState (ctx.prefix)
+
+    if ctx.dry_run:
+      self.dry_run (ctx)
+      return
+
     if (ctx.clean):
       for proj in ctx.workspace.order_projects ():
           logging.getLogger ().info ('cleaning {0}...'.format (proj.name ()))
-          proj.clean (ctx)
+
+          with Telemetry.phase ('clean', proj.name ()):
+              proj.clean (ctx)
+
+          ctx.state.remove (proj)
+
+      return
+
+    from .. import ArtifactCache
+
+    if ctx.artifact_cache is not None:
+      ctx.artifacts = ArtifactCache.ArtifactCache (ctx.artifact_cache)
     else:
-      for proj in ctx.workspace.order_projects ():
-          logging.getLogger ().info ('building {0}...'.format (proj.name ()))
-          proj.build (ctx)
-      
+      ctx.artifacts = None
+
+    ccache_stats = None
+
+    if ctx.ccache and ArtifactCache.enable_ccache (ctx.env, ctx.prefix):
+      ccache_stats = ArtifactCache.ccache_stats (ctx.env)
+
+    try:
+      if ctx.parallel_projects > 1:
+        self.build_parallel (ctx)
+      else:
+        for proj in ctx.workspace.order_projects ():
+            self.build_project (proj, ctx)
+
+    finally:
+      if ctx.artifacts is not None:
+        ctx.artifacts.report ()
+
+      if ccache_stats is not None:
+        ArtifactCache.report_ccache (ccache_stats, ArtifactCache.ccache_stats (ctx.env))
+
+  #
+  # Report what the build would do, without building. For each project,
+  # this reports if the project would be built, and if its MPC workspace
+  # would be regenerated and why.
+  #
+  # @param[in]          ctx           BuildContext object
+  #
+  def dry_run (self, ctx):
+    for proj in ctx.workspace.order_projects ():
+      if ctx.force:
+        reasons = ['forced']
+      else:
+        reasons = ctx.state.check (proj, ctx)
+
+      if len (reasons) == 0:
+        logging.getLogger ().info ('{0} is up to date'.format (proj.name ()))
+        continue
+
+      logging.getLogger ().info ('would build {0}; {1}'.format (proj.name (), ', '.join (reasons)))
+
+      # Let the dependents see that this project would change.
+      ctx.state.assume_built (proj, ctx)
+
+      mwc = proj.get_mwc_workspace (ctx)
+
+      if mwc is None:
+        continue
+
+      changes = mwc.get_changes ()
+
+      if len (changes) == 0:
+        logging.getLogger ().info ('  {0} is up to date'.format (mwc.get_workspace ()))
+      else:
+        logging.getLogger ().info ('  would regenerate {0}; {1}'.format (mwc.get_workspace (), ', '.join (changes)))
+
+  #
+  # Build a single project, unless it is up to date.
+  #
+  # @param[in]          proj          Project to build
+  # @param[in]          ctx           BuildContext object
+  #
+  def build_project (self, proj, ctx):
+    if ctx.force:
+      reasons = ['forced']
+    else:
+      reasons = ctx.state.check (proj, ctx)
+
+    if len (reasons) == 0:
+      if ctx.explain:
+        logging.getLogger ().info ('skipping {0}; inputs are unchanged'.format (proj.name ()))
+      else:
+        logging.getLogger ().info ('{0} is up to date'.format (proj.name ()))
+
+      return
+
+    if ctx.explain:
+      logging.getLogger ().info ('building {0}; {1}...'.format (proj.name (), ', '.join (reasons)))
+    else:
+      logging.getLogger ().info ('building {0}...'.format (proj.name ()))
+
+    from .. import Telemetry
+
+    # Restore the project from the artifact cache, if it has already
+    # been built elsewhere with the same inputs.
+    key = None
+
+    if ctx.artifacts is not None:
+      key = ctx.artifacts.key (proj, ctx, ctx.state.fingerprint (proj, ctx))
+
+    if key is not None and not ctx.force:
+      with Telemetry.phase ('restore', proj.name ()):
+        restored = ctx.artifacts.restore (proj, ctx, key)
+
+      if restored:
+        ctx.state.record (proj, ctx)
+        return
+
+    with Telemetry.phase ('build', proj.name ()):
+      proj.build (ctx)
+
+    ctx.state.record (proj, ctx)
+
+    if key is not None:
+      with Telemetry.phase ('store', proj.name ()):
+        ctx.artifacts.store (proj, ctx, key)
+
+  #
+  # Build the projects in the workspace concurrently. Each project is
+  # built as soon as its dependencies are built, with its own copy of
+  # the context and environment.
+  #
+  def build_parallel (self, ctx):
+    import copy
+    from ..BuildScheduler import BuildScheduler
+
+    def builder (proj, threads):
+      proj_ctx = copy.copy (ctx)
+      proj_ctx.threads = str (threads)
+      proj_ctx.env = dict (ctx.env)
+
+      self.build_project (proj, proj_ctx)
+
+    from .. import Telemetry
+
+    # Use the time each project took to build before to find the critical
+    # path of the build.
+    costs = Telemetry.get_recorded_walls (ctx.prefix, 'build', 'build')
+    scheduler = BuildScheduler (ctx.workspace, ctx.parallel_projects, int (ctx.threads), costs)
+
+    if scheduler.max_concurrent () < ctx.parallel_projects:
+      logging.getLogger ().warning ('at most {0} project(s) can build concurrently with {1} thread(s); '
+                                    'increase --threads to build more'.format (scheduler.max_concurrent (), ctx.threads))
+
+    failed, skipped = scheduler.run (builder)
+
+    # Projects are also skipped without any project failing when the
+    # dependency graph has a cycle, which still leaves them unbuilt.
+    if len (failed) > 0 or len (skipped) > 0:
+      raise Exception ('failed to build {0}'.format (', '.join (failed + skipped)))
+
 
 #
 # Utility method that configures the enviroment using the properties
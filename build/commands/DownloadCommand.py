@@ -13,6 +13,7 @@
 from ..Command import Command
 from ..Context import Context
 
+import os
 from os import path
 import logging
 
@@ -44,6 +45,42 @@ class DownloadContext (Context):
                                   help = 'Use https:// when downloading via git [default is git://]',
                                   action = 'store_true')
 
+    download_parser.add_argument ('--jobs', '-j',
+                                  help = 'Number of projects to download concurrently [default=1]',
+                                  metavar = 'N',
+                                  type = int,
+                                  default = 1)
+
+    download_parser.add_argument ('--shallow',
+                                  help = 'Clone only the pinned tag/branch of git projects, without history',
+                                  action = 'store_true')
+
+    download_parser.add_argument ('--filter',
+                                  help = 'Partial clone filter for git projects (e.g., blob:none)',
+                                  metavar = 'SPEC',
+                                  type = str)
+
+    download_parser.add_argument ('--submodule-jobs',
+                                  help = 'Number of git submodules to fetch in parallel',
+                                  metavar = 'N',
+                                  type = int)
+
+    download_parser.add_argument ('--cache-dir',
+                                  help = 'Location of the archive download cache, which can be shared by many prefixes [default=$BCZAR_CACHE]',
+                                  metavar = 'PATH',
+                                  type = str,
+                                  default = os.environ.get ('BCZAR_CACHE'))
+
+    download_parser.add_argument ('--mirror-dir',
+                                  help = 'Location of the local mirrors created by the mirror command [default=$BCZAR_MIRROR]',
+                                  metavar = 'PATH',
+                                  type = str,
+                                  default = os.environ.get ('BCZAR_MIRROR'))
+
+    download_parser.add_argument ('--timings',
+                                  help = 'Print the time taken to download each project',
+                                  action = 'store_true')
+
     download_parser.set_defaults (cmd = DownloadCommand)
     download_parser.set_defaults (ctx = DownloadContext)
 
@@ -52,6 +89,13 @@ class DownloadContext (Context):
     self.use_trunk = args.use_trunk
     self.use_https = args.use_https
     self.affiliate = args.affiliate
+    self.jobs = args.jobs
+    self.shallow = args.shallow
+    self.filter = args.filter
+    self.submodule_jobs = args.submodule_jobs
+    self.timings = args.timings
+    self.cache_dir = args.cache_dir
+    self.mirror_dir = args.mirror_dir
 
 #   
 # @class DownloadCommand
@@ -71,6 +115,20 @@ class DownloadCommand (Command):
   # Execute the command
   #
   def execute (self, ctx):
+    from .. import Telemetry
+
+    try:
+      self.run (ctx)
+    finally:
+      Telemetry.save (ctx.prefix, self.name ())
+
+  #
+  # Download the projects in the workspace, and update the configuration
+  # scripts for the prefix.
+  #
+  # @param[in]          ctx           DownloadContext object
+  #
+  def run (self, ctx):
     # Open the script files where we are going to generate the
     # configuration for the prefix.
     # Open the properties for the file.
@@ -84,12 +142,102 @@ class DownloadCommand (Command):
     from ..ScriptFile import open_script
     script = open_script (ctx.prefix)
     
-    for proj in ctx.workspace.order_projects ():
-        # Download the project.
-        logging.getLogger ().info ('downloading {0}...'.format (proj.name ()))
-        proj.download (ctx)
-        
+    # Configure how projects are cloned.
+    from ..scm import Git, Subversion
+    Git.configure (shallow = ctx.shallow,
+                   filter = ctx.filter,
+                   jobs = ctx.submodule_jobs,
+                   mirror_dir = ctx.mirror_dir)
+
+    Subversion.configure (mirror_dir = ctx.mirror_dir)
+
+    # Download the projects concurrently. The configuration scripts are
+    # still updated in the project order so their content is the same
+    # regardless of when each download completes.
+    from concurrent import futures
+
+    projects = ctx.workspace.order_projects ()
+    executor = futures.ThreadPoolExecutor (max_workers = max (1, ctx.jobs))
+
+    try:
+      downloads = []
+
+      # A project checked out inside another project's location, e.g., ADBC
+      # in DOC's Middleware, waits for that project to finish. Otherwise,
+      # the outer checkout can find its location is not empty.
+      for proj in projects:
+        overlaps = [(other.name (), download) for other, download in zip (projects, downloads)
+                      if self.overlaps (other, proj)]
+
+        downloads.append (executor.submit (self.download, proj, ctx, overlaps))
+
+      failed = []
+      timings = []
+
+      for proj, download in zip (projects, downloads):
+        try:
+          timings.append ((proj.name (), download.result ()))
+        except Exception as ex:
+          logging.getLogger ().error ('failed to download {0}: {1}'.format (proj.name (), ex))
+          failed.append (proj.name ())
+          continue
+
         # Update the configuration scripts.
         proj.update_script (ctx.prefix, propfile)
         proj.update_script (ctx.prefix, script)
 
+    finally:
+      executor.shutdown ()
+
+    if ctx.timings:
+      print ('')
+      print ('Download Timings')
+      print ('======================================')
+
+      for name, elapsed in timings:
+        print ('{0:<24} {1:>10.2f}s'.format (name, elapsed))
+
+    if len (failed) > 0:
+      raise Exception ('failed to download {0}'.format (', '.join (failed)))
+
+  #
+  # Download a single project.
+  #
+  # @param[in]          proj          Project to download
+  # @param[in]          ctx           DownloadContext object
+  # @param[in]          overlaps      Downloads to wait for, as (name, future) tuples
+  # @return             Time taken to download the project, in seconds
+  #
+  def download (self, proj, ctx, overlaps = []):
+    for name, download in overlaps:
+      if download.exception () is not None:
+        raise Exception ('{0} did not download'.format (name))
+
+    logging.getLogger ().info ('downloading {0}...'.format (proj.name ()))
+
+    from .. import Telemetry
+
+    with Telemetry.phase ('download', proj.name ()) as phase:
+      proj.download (ctx)
+
+    return phase.wall
+
+  #
+  # Test if the locations of two projects overlap, i.e., one is the same
+  # as, or inside, the other.
+  #
+  # @param[in]          proj1         First project
+  # @param[in]          proj2         Second project
+  #
+  @staticmethod
+  def overlaps (proj1, proj2):
+    location1 = proj1.get_location ()
+    location2 = proj2.get_location ()
+
+    if location1 is None or location2 is None:
+      return False
+
+    location1 = path.normpath (location1) + os.sep
+    location2 = path.normpath (location2) + os.sep
+
+    return location1.startswith (location2) or location2.startswith (location1)
@@ -0,0 +1,105 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        MirrorCommand.py
+#
+# $Id$
+#
+################################################################################
+
+from ..Command import Command
+from ..Context import Context
+
+import os
+import subprocess
+import logging
+
+#
+# Factory method for the command
+#
+def __create__ ():
+  return MirrorCommand ()
+
+#
+# @class MirrorContext
+#
+class MirrorContext (Context):
+  @staticmethod
+  def init_parser (parser):
+    mirror_parser = parser.add_parser ('mirror',
+                                       help = 'Create or update local mirrors of the repositories for all projects in the workspace',
+                                       description = 'Create or update local mirrors of the repositories for all projects in the workspace')
+
+    mirror_parser.add_argument ('--mirror-dir',
+                                help = 'Location of the local mirrors [default=$BCZAR_MIRROR]',
+                                metavar = 'PATH',
+                                type = str,
+                                default = os.environ.get ('BCZAR_MIRROR'))
+
+    mirror_parser.add_argument ('--affiliate',
+                                help = 'Use the private IU github, which requires affiliate access',
+                                action = 'store_true')
+
+    mirror_parser.add_argument ('--use-trunk',
+                                help = 'Use the trunk version for projects instead of stable',
+                                action = 'store_true')
+
+    mirror_parser.add_argument ('--use-https',
+                                help = 'Use https:// when mirroring via git [default is git://]',
+                                action = 'store_true')
+
+    mirror_parser.set_defaults (cmd = MirrorCommand)
+    mirror_parser.set_defaults (ctx = MirrorContext)
+
+  def __init__ (self, args):
+    Context.__init__ (self, args)
+    self.mirror_dir = args.mirror_dir
+    self.use_trunk = args.use_trunk
+    self.use_https = args.use_https
+    self.affiliate = args.affiliate
+
+#
+# @class MirrorCommand
+#
+# Command that creates or updates the local mirrors of the repositories
+# for all projects in the workspace. The download command clones from
+# these mirrors instead of the network.
+#
+class MirrorCommand (Command):
+  context = MirrorContext
+
+  #
+  # Get the command's name
+  #
+  def name (self):
+    return 'mirror'
+
+  #
+  # Execute the command
+  #
+  def execute (self, ctx):
+    if ctx.mirror_dir is None:
+      raise Exception ('location of mirrors is not defined; use --mirror-dir or BCZAR_MIRROR')
+
+    failed = []
+
+    for proj in ctx.workspace.order_projects ():
+      repository = proj.get_repository (ctx)
+
+      if repository is None:
+        logging.getLogger ().info ('skipping {0}; not downloaded from a repository'.format (proj.name ()))
+        continue
+
+      scm, url = repository
+      credentials = proj.get_credentials (ctx) or ()
+      logging.getLogger ().info ('mirroring {0}...'.format (proj.name ()))
+
+      try:
+        scm.update_mirror (url, ctx.mirror_dir, *credentials)
+      except (OSError, subprocess.CalledProcessError) as ex:
+        logging.getLogger ().error ('failed to mirror {0}: {1}'.format (proj.name (), ex))
+        failed.append (proj.name ())
+
+    if len (failed) > 0:
+      raise Exception ('failed to mirror {0}'.format (', '.join (failed)))
@@ -0,0 +1,304 @@
+#!/bin/env python
+
+################################################################################
+#
+# @file        ReportCommand.py
+#
+# $Id$
+#
+################################################################################
+
+from ..Command import Command
+from ..Context import Context
+
+import os
+import json
+import time
+
+#
+# Factory method for the command
+#
+def __create__ ():
+  return ReportCommand ()
+
+#
+# @class ReportContext
+#
+class ReportContext (Context):
+  @staticmethod
+  def init_parser (parser):
+    report_parser = parser.add_parser ('report',
+                                       help = 'Summarize the telemetry of a build or download',
+                                       description = 'Summarize the telemetry of a build or download, and optionally compare it to another run')
+
+    report_parser.add_argument ('run',
+                                help = 'Name or location of the run to summarize [default=most recent run]',
+                                nargs = '?',
+                                default = None)
+
+    report_parser.add_argument ('--compare',
+                                help = 'Compare the run to another run [default=run before it]',
+                                metavar = 'RUN',
+                                nargs = '?',
+                                const = '',
+                                default = None)
+
+    report_parser.add_argument ('--command',
+                                help = 'Only consider runs of this command, e.g., build or download',
+                                type = str)
+
+    report_parser.add_argument ('--top', '-n',
+                                help = 'Number of phases to show [default=10]',
+                                metavar = 'N',
+                                type = int,
+                                default = 10)
+
+    report_parser.add_argument ('--list',
+                                help = 'List the runs recorded for the prefix',
+                                action = 'store_true')
+
+    report_parser.set_defaults (cmd = ReportCommand)
+    report_parser.set_defaults (ctx = ReportContext)
+
+  def __init__ (self, args):
+    Context.__init__ (self, args)
+    self.run = args.run
+    self.compare = args.compare
+    self.command = args.command
+    self.top = args.top
+    self.list = args.list
+
+#
+# @class ReportCommand
+#
+# Command that summarizes the telemetry recorded by the build and download
+# commands. The report shows the slowest phases of a run, and the phases
+# that changed the most when compared to another run.
+#
+class ReportCommand (Command):
+  context = ReportContext
+
+  #
+  # Get the command's name
+  #
+  def name (self):
+    return 'report'
+
+  #
+  # Execute the command
+  #
+  def execute (self, ctx):
+    from ..Telemetry import get_telemetry_dir
+    runs = self.get_runs (get_telemetry_dir (ctx.prefix), ctx.command)
+
+    if ctx.list:
+      for filename in runs:
+        print (os.path.basename (filename)[:-5])
+
+      return
+
+    filename = self.find_run (runs, ctx.run)
+    run = self.load_run (filename)
+
+    if ctx.compare is None:
+      self.summarize (run, filename, ctx.top)
+      return
+
+    if ctx.compare == '':
+      # Compare to the run before this one, for the same command.
+      earlier = [other for other in runs
+                   if other < filename and other.endswith ('-%s.json' % run['command'])]
+
+      if len (earlier) == 0:
+        raise Exception ('no run of {0} before {1}'.format (run['command'], os.path.basename (filename)))
+
+      baseline_filename = earlier[-1]
+    else:
+      baseline_filename = self.find_run (runs, ctx.compare)
+
+    self.compare (self.load_run (baseline_filename), baseline_filename, run, filename, ctx.top)
+
+  #
+  # Get the runs recorded in the telemetry directory, from oldest to newest.
+  #
+  # @param[in]          dirname       Location of the telemetry
+  # @param[in]          command       Only include runs of this command
+  #
+  def get_runs (self, dirname, command = None):
+    if not os.path.isdir (dirname):
+      return []
+
+    runs = []
+
+    for basename in os.listdir (dirname):
+      if not basename.endswith ('.json') or basename.endswith ('.trace.json'):
+        continue
+
+      if command is not None and not basename.endswith ('-%s.json' % command):
+        continue
+
+      runs.append (os.path.join (dirname, basename))
+
+    return sorted (runs)
+
+  #
+  # Locate a run by its location, its name, or the start of its name.
+  #
+  # @param[in]          runs          Runs in the telemetry directory
+  # @param[in]          name          Name of the run, or None for the newest
+  #
+  def find_run (self, runs, name):
+    if name is None:
+      if len (runs) == 0:
+        raise Exception ('no telemetry recorded; run the build or download command first')
+
+      return runs[-1]
+
+    if os.path.isfile (name):
+      return name
+
+    matches = [filename for filename in runs
+                 if os.path.basename (filename).startswith (name)]
+
+    if len (matches) == 0:
+      raise Exception ('cannot find run {0}'.format (name))
+
+    return matches[-1]
+
+  #
+  # Load a run from disk.
+  #
+  def load_run (self, filename):
+    with open (filename, 'r') as run_file:
+      return json.load (run_file)
+
+  #
+  # Aggregate the phases of a run by project and phase name. A phase that
+  # runs more than once for a project, e.g., Boost's headers, is summed.
+  #
+  # @param[in]          run           Telemetry of the run
+  # @return             Dictionary of (project, phase) to totals
+  #
+  def aggregate (self, run):
+    totals = {}
+
+    for item in run['phases']:
+      key = (item['project'] or '', item['name'])
+      total = totals.setdefault (key, {'wall' : 0.0,
+                                       'cpu' : 0.0,
+                                       'max_rss' : 0,
+                                       'depth' : item['depth'],
+                                       'status' : 'ok'})
+
+      total['wall'] += item['wall']
+      total['cpu'] += item['cpu_user'] + item['cpu_system']
+      total['max_rss'] = max (total['max_rss'], item['max_rss'])
+      total['depth'] = min (total['depth'], item['depth'])
+
+      if item['status'] != 'ok':
+        total['status'] = item['status']
+
+    return totals
+
+  #
+  # Print the slowest phases of a run.
+  #
+  def summarize (self, run, filename, top):
+    totals = self.aggregate (run)
+
+    print ('Run:     {0}'.format (os.path.basename (filename)[:-5]))
+    print ('Command: {0}'.format (' '.join (run['argv'])))
+    print ('Started: {0}'.format (time.strftime ('%Y-%m-%d %H:%M:%S', time.localtime (run['start']))))
+    print ('Wall:    {0:.2f}s'.format (run['wall']))
+
+    # The top-level phase of each project, e.g., build or download.
+    projects = sorted ([(key, total) for key, total in totals.items () if total['depth'] == 0],
+                       key = lambda x: x[1]['wall'],
+                       reverse = True)
+
+    print ('')
+    print ('Projects')
+    print ('=' * 78)
+    self.print_phases (projects[:top])
+
+    # The phases nested within a project, e.g., configure or make.
+    phases = sorted ([(key, total) for key, total in totals.items () if total['depth'] > 0],
+                     key = lambda x: x[1]['wall'],
+                     reverse = True)
+
+    if len (phases) > 0:
+      print ('')
+      print ('Slowest Phases')
+      print ('=' * 78)
+      self.print_phases (phases[:top])
+
+  #
+  # Print a table of phases.
+  #
+  def print_phases (self, phases):
+    print ('{0:<20} {1:<12} {2:>10} {3:>10} {4:>10} {5:>10}'.format ('project', 'phase', 'wall', 'cpu', 'peak rss', 'status'))
+
+    for (project, name), total in phases:
+      print ('{0:<20} {1:<12} {2:>9.2f}s {3:>9.2f}s {4:>8.1f}MB {5:>10}'.format (project,
+                                                                                  name,
+                                                                                  total['wall'],
+                                                                                  total['cpu'],
+                                                                                  total['max_rss'] / 1024.0,
+                                                                                  total['status']))
+
+  #
+  # Print the phases that changed the most between two runs.
+  #
+  def compare (self, baseline, baseline_filename, run, filename, top):
+    before = self.aggregate (baseline)
+    after = self.aggregate (run)
+
+    print ('Baseline: {0} ({1:.2f}s)'.format (os.path.basename (baseline_filename)[:-5], baseline['wall']))
+    print ('Run:      {0} ({1:.2f}s)'.format (os.path.basename (filename)[:-5], run['wall']))
+    print ('Change:   {0}'.format (self.format_change (baseline['wall'], run['wall'])))
+
+    changes = []
+
+    for key in set (before.keys ()) | set (after.keys ()):
+      old = before.get (key, {}).get ('wall')
+      new = after.get (key, {}).get ('wall')
+      changes.append ((key, old, new, (new or 0.0) - (old or 0.0)))
+
+    changes.sort (key = lambda x: abs (x[3]), reverse = True)
+
+    print ('')
+    print ('Largest Changes')
+    print ('=' * 78)
+    print ('{0:<20} {1:<12} {2:>10} {3:>10} {4:>20}'.format ('project', 'phase', 'baseline', 'run', 'change'))
+
+    for (project, name), old, new, delta in changes[:top]:
+      print ('{0:<20} {1:<12} {2:>10} {3:>10} {4:>20}'.format (project,
+                                                              name,
+                                                              self.format_time (old),
+                                                              self.format_time (new),
+                                                              self.format_change (old, new)))
+
+  #
+  # Format a time, which is None if the phase did not run.
+  #
+  def format_time (self, value):
+    if value is None:
+      return '-'
+
+    return '{0:.2f}s'.format (value)
+
+  #
+  # Format the change between two times.
+  #
+  def format_change (self, old, new):
+    if old is None:
+      return 'new'
+    elif new is None:
+      return 'removed'
+
+    delta = new - old
+
+    if old > 0:
+      return '{0:+.2f}s ({1:+.1f}%)'.format (delta, delta * 100.0 / old)
+    else:
+      return '{0:+.2f}s'.format (delta)
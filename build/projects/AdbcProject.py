@@ -50,17 +50,25 @@ class AdbcProject(Project):
     return ['SQLite', 'MPC', 'DOC']
 
   #
-  # Download the project's source files. The download can be from an online
-  # archive, or a source code repository.
+  # Get the project's source code repository.
   #
-  def download(self, ctx):
+  def get_repository(self, ctx):
     if ctx.use_https:
       url = 'https://github.com/DOCGroup/ADBC.git'
     else:
       url = 'git@github.com:DOCGroup/ADBC.git'
 
+    return (Git, url)
+
+  #
+  # Download the project's source files. The download can be from an online
+  # archive, or a source code repository.
+  #
+  def download(self, ctx):
+    scm, url = self.get_repository(ctx)
+
     abspath = path.abspath(path.join(ctx.prefix, self.__location__))
-    Git.checkout(url=url, location=abspath)
+    scm.checkout(url=url, location=abspath)
 
   #
   # Set the project's environment variables.
@@ -132,15 +140,30 @@ class AdbcProject(Project):
     # Now, we are goig to build ADBC
     ADBC_ROOT = self.get_ADBC_ROOT()
     workspace = path.join(ADBC_ROOT, 'ADBC.mwc')
+    features = self.get_features(ctx)
 
+    from ..MpcWorkspace import MpcContext, MpcWorkspace
+    mpc_ctx = MpcContext(workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env=ctx.env)
+    return MpcWorkspace(mpc_ctx)
+
+  #
+  # Get the features used to build the project
+  #
+  def get_features(self, ctx):
     features = 'sqlite3=1'
 
     if ctx.versioned_namespace:
       features += ',versioned_namespace=1'
 
-    from ..MpcWorkspace import MpcContext, MpcWorkspace
-    mpc_ctx = MpcContext(workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
-    return MpcWorkspace(mpc_ctx)
+    return features
+
+  #
+  # Get the outputs of building the project, which are the files generated
+  # in its source tree.
+  #
+  def get_artifacts(self, ctx):
+    abspath = path.abspath(path.join(ctx.prefix, self.__location__))
+    return [path.join(self.__location__, name) for name in Git.untracked_files(abspath)]
 
   def get_ADBC_ROOT(self):
     return os.environ['ADBC_ROOT']
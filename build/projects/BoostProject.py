@@ -41,17 +41,32 @@ class BoostProject (Project):
         Project.__init__ (self, 'Boost')
 
     #
-    # Download the Boost source files. The source files are taken from
-    # trunk in the SVN repo.
+    # Get the project's source code repository.
     #
-    def download (self, ctx):
+    def get_repository (self, ctx):
         if ctx.use_https:
             url = 'https://github.com/boostorg/boost.git'
         else:
             url = 'git@github.com:boostorg/boost.git'
+
+        return (Git, url)
+
+    #
+    # Get the outputs of building the project. Boost is installed into its
+    # lib and include directories, and b2 generates the boost headers directory.
+    #
+    def get_artifacts (self, ctx):
+        return [path.join (self.__location__, name) for name in ['lib', 'include', 'boost']]
+
+    #
+    # Download the Boost source files. The source files are taken from
+    # trunk in the SVN repo.
+    #
+    def download (self, ctx):
+        scm, url = self.get_repository (ctx)
         tag = 'boost-1.63.0'
         abspath = path.abspath (path.join (ctx.prefix, self.__location__))
-        Git.checkout (url, abspath, tag=tag)
+        scm.checkout (url, abspath, tag=tag)
 
     #
     # Set the project's environment variables.
@@ -119,7 +134,7 @@ class BoostProject (Project):
     # Build the project
     #
     def build (self, ctx):
-        import subprocess
+        from .. import Telemetry
 
         BOOST_ROOT = os.environ['BOOST_ROOT']
         project_config = path.join (BOOST_ROOT, 'project-config.jam')
@@ -136,7 +151,7 @@ class BoostProject (Project):
               bootstrap = path.join (BOOST_ROOT, 'bootstrap.sh')
 
             cmd = [bootstrap, prefix_arg]
-            subprocess.check_call (cmd, cwd = BOOST_ROOT)
+            Telemetry.check_call (cmd, phase = 'bootstrap', cwd = BOOST_ROOT, env = ctx.env)
 
         # Generate the Boost headers. This line is need for Boost 1.56 or greater.
         # It may even be needed for an earlier version. To play it safe, we are going
@@ -149,7 +164,7 @@ class BoostProject (Project):
 
         if path.exists (b2):
             cmd = [b2, 'headers']
-            subprocess.check_call (cmd, cwd = BOOST_ROOT)
+            Telemetry.check_call (cmd, phase = 'headers', cwd = BOOST_ROOT, env = ctx.env)
 
         # Now, we can actually build Boost using the local version of bjam
         bjam = path.join (BOOST_ROOT, 'bjam')
@@ -177,7 +192,7 @@ class BoostProject (Project):
         else:
           cmd = [bjam, prefix_arg, '--without-python', '-j' + ctx.threads, 'install', '-sNO_COMPRESSION=1']
 
-        subprocess.check_call (cmd, cwd = BOOST_ROOT)
+        Telemetry.check_call (cmd, phase = 'install', cwd = BOOST_ROOT, env = ctx.env)
 
         # Run b2 headers to ensure all headers get copied to the correct location
         b2 = path.join (BOOST_ROOT, 'b2')
@@ -185,7 +200,7 @@ class BoostProject (Project):
                prefix_arg,
                'headers']
 
-        subprocess.check_call (cmd, cwd=BOOST_ROOT)
+        Telemetry.check_call (cmd, phase = 'headers', cwd=BOOST_ROOT, env=ctx.env)
 
     #
     # Fix iostreams jamfile for linux builds
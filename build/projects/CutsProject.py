@@ -55,22 +55,33 @@ class CutsProject (Project):
     #
     def download (self, ctx):
         abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+        scm, url = self.get_repository (ctx)
+        scm.checkout (url, abspath)
 
-        from ..scm import Git
-
+    #
+    # Get the project's source code repository.
+    #
+    def get_repository (self, ctx):
         if ctx.affiliate:
             if ctx.use_https:
                 url = 'https://github.iu.edu/SEDS/CUTS.git'
             else:
                 url = 'git@github.iu.edu:SEDS/CUTS.git'
-
-            Git.checkout (url, abspath)
         else:
             if not ctx.use_https:
                 logging.getLogger ().warn ('Github only supports HTTPS checkouts.')
 
             url = 'https://github.com/SEDS/CUTS.git'
-            Git.checkout (url, abspath)
+
+        return (Git, url)
+
+    #
+    # Get the outputs of building the project, which are the files generated
+    # in its source tree.
+    #
+    def get_artifacts (self, ctx):
+        abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+        return [path.join (self.__location__, name) for name in Git.untracked_files (abspath)]
 
     #
     # Update the CUTS project to its latest controlled version.
@@ -188,7 +199,17 @@ class CutsProject (Project):
     def get_mwc_workspace (self, ctx):
         CUTS_ROOT = self.get_CUTS_ROOT ()
         workspace = path.join (CUTS_ROOT, 'CUTS.mwc')
+        features = self.get_features (ctx)
 
+        # Generate the workspace
+        from ..MpcWorkspace import MpcContext, MpcWorkspace
+        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env = ctx.env)
+        return MpcWorkspace (mpc_ctx)
+
+    #
+    # Get the features used to build the project
+    #
+    def get_features (self, ctx):
         if sys.platform == 'win32':
             features = 'runtime=1,boost=1,xerces3=1,ccm=1,tcpip=1,sqlite3=1,pcre=1,mfc=1,mpi=0,xsc=1'
         else:
@@ -236,11 +257,7 @@ class CutsProject (Project):
         else:
             features += ',qpidpb=0'
 
-        # Generate the workspace
-
-        from ..MpcWorkspace import MpcContext, MpcWorkspace
-        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
-        return MpcWorkspace (mpc_ctx)
+        return features
 
     def get_CUTS_ROOT (self):
         return os.environ['CUTS_ROOT']
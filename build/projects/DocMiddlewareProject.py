@@ -12,10 +12,10 @@
 
 from ..Project import Project
 from ..scm import Git
+from .. import Telemetry
 
 import os
 from os import path
-import subprocess
 import logging
 
 
@@ -51,22 +51,29 @@ class DocMiddlewareProject(Project):
     return ['Boost', 'MPC', 'XercesC']
 
   #
-  # Downlaod the project's source files. The download can be from an online
-  # archive, or a source code repository.
+  # Get the project's source code repository.
   #
-  def download(self, ctx):
+  def get_repository(self, ctx):
     if ctx.use_https:
       url = 'https://github.com/DOCGroup/ATCD.git'
     else:
       url = 'git@github.com:DOCGroup/ATCD.git'
 
+    return (Git, url)
+
+  #
+  # Downlaod the project's source files. The download can be from an online
+  # archive, or a source code repository.
+  #
+  def download(self, ctx):
+    scm, url = self.get_repository(ctx)
     tag = None
 
     if not ctx.use_trunk:
       tag = 'ACE+TAO+CIAO-6_3_2'
 
     abspath = path.abspath(path.join(ctx.prefix, self.__location__))
-    Git.checkout(url=url, location=abspath, tag=tag)
+    scm.checkout(url=url, location=abspath, tag=tag)
 
   #
   # Set the project's environment variables.
@@ -200,7 +207,7 @@ class DocMiddlewareProject(Project):
 
       if not path.exists(target):
         cmd = ['cp', source, target]
-        subprocess.check_call(cmd)
+        Telemetry.check_call(cmd, phase='configure', env=ctx.env)
 
         if force_no_hidden_visibility:
           # Prepend macros with no hidden visibility flag
@@ -240,19 +247,7 @@ ${config_prefix}
       config.close()
 
     # First, we are going to build ACE + TAO + CIAO + DAnCE
-    CIAO_ROOT = path.abspath(path.join(ctx.prefix, self.__location__, 'CIAO'))
-    os.environ['CIAO_ROOT'] = CIAO_ROOT
-
-    workspace = path.join(CIAO_ROOT, 'CIAO_TAO_DAnCE.mwc')
-
-    features = "xerces3=1,boost=1"
-
-    if ctx.versioned_namespace:
-      features += ',versioned_namespace=1'
-
-    from ..MpcWorkspace import MpcContext, MpcWorkspace
-    mpc_ctx = MpcContext(workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
-    mwc = MpcWorkspace(mpc_ctx)
+    mwc = self.get_mwc_workspace(ctx)
 
     mwc.generate()
     mwc.build()
@@ -265,17 +260,40 @@ ${config_prefix}
     from string import Template
 
     # First, we are going to build ACE + TAO + CIAO + DAnCE
+    mwc = self.get_mwc_workspace(ctx)
+    mwc.clean()
+
+  #
+  # Get the MWC workspace file
+  #
+  def get_mwc_workspace(self, ctx):
     CIAO_ROOT = path.abspath(path.join(ctx.prefix, self.__location__, 'CIAO'))
-    os.environ['CIAO_ROOT'] = CIAO_ROOT
+    ctx.env['CIAO_ROOT'] = CIAO_ROOT
 
     workspace = path.join(CIAO_ROOT, 'CIAO_TAO_DAnCE.mwc')
+    features = self.get_features(ctx)
+
+    from ..MpcWorkspace import MpcContext, MpcWorkspace
+    mpc_ctx = MpcContext(workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env=ctx.env)
+    return MpcWorkspace(mpc_ctx)
 
+  #
+  # Get the features used to build the project
+  #
+  def get_features(self, ctx):
     features = "xerces3=1,boost=1"
 
     if ctx.versioned_namespace:
       features += ',versioned_namespace=1'
 
-    from ..MpcWorkspace import MpcContext, MpcWorkspace
-    mpc_ctx = MpcContext(workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
-    mwc = MpcWorkspace(mpc_ctx)
-    mwc.clean()
+    return features
+
+  #
+  # Get the outputs of building the project. The project is built in its
+  # source tree, so the outputs are the files the checkout does not track.
+  # Along with the binaries, this includes the ace/config.h and
+  # platform_macros.GNU files, and the files generated from IDL.
+  #
+  def get_artifacts(self, ctx):
+    abspath = path.abspath(path.join(ctx.prefix, self.__location__))
+    return [path.join(self.__location__, name) for name in Git.untracked_files(abspath)]
@@ -42,22 +42,29 @@ class MpcProject(Project):
     Project.__init__(self, 'MPC')
 
   #
-  # Downlaod the project's source files. The download can be from an online
-  # archive, or a source code repository.
+  # Get the project's source code repository.
   #
-  def download(self, ctx):
+  def get_repository(self, ctx):
     if ctx.use_https:
       url = 'https://github.com/DOCGroup/MPC.git'
     else:
       url = 'git@github.com:DOCGroup/MPC.git'
 
+    return (Git, url)
+
+  #
+  # Downlaod the project's source files. The download can be from an online
+  # archive, or a source code repository.
+  #
+  def download(self, ctx):
+    scm, url = self.get_repository(ctx)
     tag = None
 
     if not ctx.use_trunk:
       tag = 'ACE+TAO+CIAO-6_3_2'
 
     abspath = path.abspath(path.join(ctx.prefix, self.__location__))
-    Git.checkout(url=url, location=abspath, tag=tag)
+    scm.checkout(url=url, location=abspath, tag=tag)
 
   #
   # Set the project's environment variables.
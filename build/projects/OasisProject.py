@@ -51,20 +51,25 @@ class OasisProject (Project):
     #
     def download (self, ctx):
         abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+        scm, url = self.get_repository (ctx)
+        scm.checkout (url, abspath)
 
+    #
+    # Get the project's source code repository.
+    #
+    def get_repository (self, ctx):
         if ctx.affiliate:
             if ctx.use_https:
                 url = 'https://github.iu.edu/SEDS/OASIS.git'
             else:
                 url = 'git@github.iu.edu:SEDS/OASIS.git'
-
-            Git.checkout (url, abspath)
         else:
             if not ctx.use_https:
                 logging.getLogger ().warn ('Github only supports HTTPS checkouts.')
 
             url = 'https://github.com/SEDS/OASIS.git'
-            Git.checkout (url, abspath)
+
+        return (Git, url)
 
     # Set environment variables
     def set_env_variables (self, prefix):
@@ -77,6 +82,14 @@ class OasisProject (Project):
         append_path_variable (path.join (abspath, 'bin'))
         append_libpath_variable (path.join (abspath, 'lib'))
 
+    #
+    # Get the outputs of building the project, which are the files generated
+    # in its source tree.
+    #
+    def get_artifacts (self, ctx):
+        abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+        return [path.join (self.__location__, name) for name in Git.untracked_files (abspath)]
+
     #
     # Validate environment for the project
     #
@@ -109,12 +122,32 @@ class OasisProject (Project):
     # Build the XSC project.
     #
     def build (self, ctx):
+        OASIS_ROOT = os.environ['OASIS_ROOT']
+        feature_file = path.join (OASIS_ROOT, 'default.features')
+
+        mwc = self.get_mwc_workspace (ctx)
+
+        mwc.generate_default_feature_file (feature_file)
+        mwc.generate ()
+        mwc.build ()
+
+    #
+    # Get the MWC workspace file
+    #
+    def get_mwc_workspace (self, ctx):
         OASIS_ROOT = os.environ['OASIS_ROOT']
         workspace = path.join (OASIS_ROOT, 'OASIS.mwc')
+        features = self.get_features (ctx)
 
-        # Generate the workspace
+        from ..MpcWorkspace import MpcContext, MpcWorkspace
+        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env = ctx.env)
+        return MpcWorkspace (mpc_ctx)
+
+    #
+    # Get the features used to build the project
+    #
+    def get_features (self, ctx):
         features = 'xerces3=1,boost=1,tao=1,sqlite3=1,tests=0,performance_tests=0,build=0,examples=0,snmp=0,noinline=0'
-        feature_file = path.join (OASIS_ROOT, 'default.features')
 
         if 'TENA_HOME' in os.environ:
             features += ',tena=1'
@@ -129,13 +162,7 @@ class OasisProject (Project):
         if ctx.versioned_namespace:
             features += ',versioned_namespace=1'
 
-        from ..MpcWorkspace import MpcContext, MpcWorkspace
-        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
-        mwc = MpcWorkspace (mpc_ctx)
-
-        mwc.generate_default_feature_file (feature_file)
-        mwc.generate ()
-        mwc.build ()
+        return features
 
     #
     # Build the XSC project.
@@ -166,7 +193,7 @@ class OasisProject (Project):
             features += ',versioned_namespace=1'
 
         from ..MpcWorkspace import MpcContext, MpcWorkspace
-        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
+        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env = ctx.env)
         mwc = MpcWorkspace (mpc_ctx)
 
         mwc.clean ()
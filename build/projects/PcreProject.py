@@ -53,13 +53,26 @@ class PcreProject (Project):
     # archive, or a source code repository.
     #
     def download (self, ctx):
+        scm, url = self.get_repository (ctx)
+        abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+        scm.checkout (url, abspath)
+
+    #
+    # Get the project's source code repository.
+    #
+    def get_repository (self, ctx):
         if ctx.use_trunk:
             url = 'svn://vcs.exim.org/pcre/code/trunk'
         else:
             url = 'svn://vcs.exim.org/pcre/code/tags/pcre-8.21'
-            
-        abspath = path.abspath (path.join (ctx.prefix, self.__location__))
-        Subversion.checkout (url, abspath)
+
+        return (Subversion, url)
+
+    #
+    # Get the outputs of building the project.
+    #
+    def get_artifacts (self, ctx):
+        return [path.join (self.__location__, name) for name in ['bin', 'include', 'lib']]
 
     #
     # Set the project's environment variables.
@@ -104,7 +117,7 @@ class PcreProject (Project):
     # Build the project
     #
     def build (self, ctx):
-        import subprocess
+        from .. import Telemetry
         from os.path import join, splitext
         from string import Template
        
@@ -229,7 +242,7 @@ workspace (pcre) {
 
             # 4. Build the project.
             from ..MpcWorkspace import MpcContext, MpcWorkspace
-            mpc_ctx = MpcContext (workspace_filename, ctx.build_type, 'Release', ctx.threads, None, True)
+            mpc_ctx = MpcContext (workspace_filename, ctx.build_type, 'Release', ctx.threads, None, True, env = ctx.env)
             mwc =  MpcWorkspace (mpc_ctx)
 
             mwc.generate ()
@@ -267,15 +280,15 @@ workspace (pcre) {
             # We can then proceed with running automake to generate
             # the ./configure script.
             cmd = ['./autogen.sh']
-            subprocess.check_call (cmd, cwd = PCRE_ROOT)
+            Telemetry.check_call (cmd, phase = 'bootstrap', cwd = PCRE_ROOT, env = ctx.env)
 
             # Execute the ./configure script so we can build PCRE
             cmd = ['./configure', '--prefix=' + PCRE_ROOT]
-            subprocess.check_call (cmd, cwd = PCRE_ROOT)
+            Telemetry.check_call (cmd, phase = 'configure', cwd = PCRE_ROOT, env = ctx.env)
 
             # Finally, we can build PCRE
             cmd = ['make', '-j', ctx.threads, 'install']
-            subprocess.check_call (cmd, cwd = PCRE_ROOT)
+            Telemetry.check_call (cmd, phase = 'install', cwd = PCRE_ROOT, env = ctx.env)
 
     #
     # Helper method that fixes the SDO linkage error that resulted
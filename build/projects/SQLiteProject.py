@@ -43,13 +43,24 @@ class SQLiteProject (Project):
         else:
             self.__sqlite_basename__ = 'sqlite-autoconf-3070800'
 
+    #
+    # Get the location of the project's source files.
+    #
+    def get_location (self):
+        return self.__sqlite_basename__
+
+    #
+    # Get the outputs of building the project.
+    #
+    def get_artifacts (self, ctx):
+        return [path.join (self.__sqlite_basename__, name) for name in ['bin', 'include', 'lib']]
+
     #
     # Downlaod the project's source files. The download can be from an online
     # archive, or a source code repository.
     #
     def download (self, ctx):
-        from ..Utilities import download_url
-        from ..Utilities import unpackage_archive
+        from ..Utilities import download_archive
 
         abspath = path.abspath (path.join (ctx.prefix, self.__sqlite_basename__))
 
@@ -63,27 +74,19 @@ class SQLiteProject (Project):
                 sqlite_archive = self.__sqlite_basename__ + '.tar.gz'
 
             sqlite_url = 'http://www.sqlite.org/' + sqlite_archive
-            sqlite_localfile = path.join (ctx.prefix, sqlite_archive)
 
-            download_url (sqlite_url, sqlite_localfile)
-
-            # Unpackage the archive, and remove it from disk.
-            unpackage_archive (sqlite_localfile, path.abspath (ctx.prefix))
-            os.remove (sqlite_localfile)
+            # Download and unpackage the archive.
+            download_archive (sqlite_url, path.abspath (ctx.prefix), ctx.cache_dir)
 
             if sys.platform == 'win32':
                 # On Windows, we need to a little extra work just to download
                 # all the necessary files to build SQLite.
                 sqlite_archive = 'sqlite-dll-win32-x86-3070800.zip'
                 sqlite_url = 'http://www.sqlite.org/' + sqlite_archive
-                sqlite_localfile = path.join (ctx.prefix, sqlite_archive)
-    
-                download_url (sqlite_url, sqlite_localfile)
-    
-                # Unpackage the archive, and remove it from disk.
+
+                # Download and unpackage the archive.
                 target = path.join (path.abspath (ctx.prefix), self.__sqlite_basename__)
-                unpackage_archive (sqlite_localfile, target)
-                os.remove (sqlite_localfile)
+                download_archive (sqlite_url, target, ctx.cache_dir)
     
                 # Now, we need to run LIB on the dll to create the input
                 # library for SQLite.
@@ -158,6 +161,7 @@ class SQLiteProject (Project):
     # Build the project
     #
     def build (self, ctx):
+        from .. import Telemetry
         SQLITE_ROOT = os.environ['SQLITE_ROOT']
 
         if sys.platform == 'win32':
@@ -165,13 +169,11 @@ class SQLiteProject (Project):
         else:
           # Configure SQLite build environment
           cmd = ['./configure', '--prefix=' +  SQLITE_ROOT]
-          __ap__ = subprocess.Popen (cmd, cwd = SQLITE_ROOT)
-          __ap__.wait ()
+          Telemetry.check_call (cmd, phase = 'configure', cwd = SQLITE_ROOT, env = ctx.env)
 
           # We can now build SQLite.
           cmd = ['make', '-j', ctx.threads, 'install']
-          __ap__ = subprocess.Popen (cmd, cwd = SQLITE_ROOT)
-          __ap__.wait ()
+          Telemetry.check_call (cmd, phase = 'install', cwd = SQLITE_ROOT, env = ctx.env)
 
     #
     # Build the project
@@ -184,5 +186,5 @@ class SQLiteProject (Project):
         else:
           # We can now build SQLite.
           cmd = ['make', 'clean']
-          __ap__ = subprocess.Popen (cmd, cwd = SQLITE_ROOT)
+          __ap__ = subprocess.Popen (cmd, cwd = SQLITE_ROOT, env = ctx.env)
           __ap__.wait ()
@@ -41,7 +41,31 @@ class XercescProject (Project):
         self.__location__ = 'xerces-c-3.1.4'
         self.__dll_version__ = '3_1'
         self._basename_ = self.__location__
-        
+        self.__trunk_url__ = 'https://svn.apache.org/repos/asf/xerces/c/trunk'
+
+    #
+    # Get the project's source code repository. Only trunk is downloaded
+    # from a repository. Otherwise, the sources are downloaded from an
+    # archive.
+    #
+    def get_repository (self, ctx):
+        if ctx.use_trunk:
+            return (Subversion, self.__trunk_url__)
+
+        return None
+
+    #
+    # Get the credentials for the SVN repo, which allows anonymous access.
+    #
+    def get_credentials (self, ctx):
+        return ('anonymous', 'anonymous')
+
+    #
+    # Get the outputs of building the project.
+    #
+    def get_artifacts (self, ctx):
+        return [path.join (self.__location__, name) for name in ['bin', 'include', 'lib']]
+
     #
     # Download the Xerces-C source files. The source files are taken from
     # trunk in the SVN repo.
@@ -53,8 +77,7 @@ class XercescProject (Project):
             build_type = autodetect_build_type ()
 
             if ctx.use_trunk or (build_type == 'vc11'):
-                url = 'https://svn.apache.org/repos/asf/xerces/c/trunk'
-                Subversion.checkout (url, abspath, 'anonymous', 'anonymous')
+                Subversion.checkout (self.__trunk_url__, abspath, *self.get_credentials (ctx))
 
                 # Trunk checkouts do not have the configure script required for
                 # linux builds.  It must be generated using the helper script reconf
@@ -72,16 +95,10 @@ class XercescProject (Project):
                     archive = self._basename_ + '.tar.gz'
               
                 url = 'http://www.apache.org/dist/xerces/c/3/sources/' + archive
-                localfile = os.path.join (ctx.prefix, archive)
-
-                from ..Utilities import download_url
-                download_url (url, localfile)
 
-                # Unpackage the archive, and remove it from disk.
-                from ..Utilities import unpackage_archive
-                unpackage_archive (localfile, os.path.abspath (ctx.prefix))
-                
-                os.remove (localfile)
+                # Download and unpackage the archive.
+                from ..Utilities import download_archive
+                download_archive (url, os.path.abspath (ctx.prefix), ctx.cache_dir)
         else:
             logging.getLogger ().info ('{0} already exists; skipping...'.format (abspath))
 
@@ -129,7 +146,7 @@ class XercescProject (Project):
     # Build the project
     #
     def build (self, ctx):
-        import subprocess
+        from .. import Telemetry
         
         XERCESCROOT = os.environ['XERCESCROOT']
 
@@ -161,7 +178,7 @@ class XercescProject (Project):
                 cmd = [get_vc_executable (), sln, '/useenv', '/Project', 'XercesLib']
                 cmd.extend (['/Build', config])
 
-                subprocess.check_call (cmd, cwd = XERCESCROOT)
+                Telemetry.check_call (cmd, phase = 'make', cwd = XERCESCROOT, env = ctx.env)
 
                 # Copy all output files to the library path.
                 tmp = config.split ('|')
@@ -208,10 +225,10 @@ class XercescProject (Project):
         else:
             # Let's configure Xerces-C using the new configuration script.
             cmd = ['./configure', '--prefix=' + XERCESCROOT]
-            subprocess.check_call (cmd, cwd = XERCESCROOT)
+            Telemetry.check_call (cmd, phase = 'configure', cwd = XERCESCROOT, env = ctx.env)
 
             cmd = ['make', '-j', ctx.threads, 'install']
-            subprocess.check_call (cmd, cwd = XERCESCROOT)
+            Telemetry.check_call (cmd, phase = 'install', cwd = XERCESCROOT, env = ctx.env)
 
     #
     # Build the project
@@ -243,7 +260,7 @@ class XercescProject (Project):
                 cmd = [get_vc_executable (), sln, '/useenv', '/Project', 'XercesLib']
                 cmd.extend (['/Clean', config])
 
-                subprocess.check_call (cmd, cwd = XERCESCROOT)
+                subprocess.check_call (cmd, cwd = XERCESCROOT, env = ctx.env)
 
             # Now that we are done cleaning the project, we need to
             # populate the include directory.
@@ -256,4 +273,4 @@ class XercescProject (Project):
         else:
             # Let's configure Xerces-C using the new configuration script.
             cmd = ['make', 'clean']
-            subprocess.check_call (cmd, cwd = XERCESCROOT)
+            subprocess.check_call (cmd, cwd = XERCESCROOT, env = ctx.env)
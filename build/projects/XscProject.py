@@ -52,8 +52,22 @@ class XscProject (Project):
     #
     def download (self, ctx):
         abspath = path.abspath (path.join (ctx.prefix, self.__location__))
-        url = 'https://github.com/SEDS/XSC.git'
-        Git.checkout (url, abspath)
+        scm, url = self.get_repository (ctx)
+        scm.checkout (url, abspath)
+
+    #
+    # Get the project's source code repository.
+    #
+    def get_repository (self, ctx):
+        return (Git, 'https://github.com/SEDS/XSC.git')
+
+    #
+    # Get the outputs of building the project, which are the files generated
+    # in its source tree.
+    #
+    def get_artifacts (self, ctx):
+        abspath = path.abspath (path.join (ctx.prefix, self.__location__))
+        return [path.join (self.__location__, name) for name in Git.untracked_files (abspath)]
 
     #
     # Set the project's environment variables.
@@ -97,21 +111,22 @@ class XscProject (Project):
     # Build the XSC project.
     #
     def build (self, ctx):
-        XSC_ROOT = os.environ['XSC_ROOT']
-        workspace = path.join (XSC_ROOT, 'XSC.mwc')
+        mwc = self.get_mwc_workspace (ctx)
 
-        # Generate the workspace
-        features = 'xerces3=1,boost=1,exceptions=1'
+        mwc.generate ()
+        mwc.build ()
 
-        if ctx.versioned_namespace:
-            features += ',versioned_namespace=1'
+    #
+    # Get the MWC workspace file
+    #
+    def get_mwc_workspace (self, ctx):
+        XSC_ROOT = os.environ['XSC_ROOT']
+        workspace = path.join (XSC_ROOT, 'XSC.mwc')
+        features = self.get_features (ctx)
 
         from ..MpcWorkspace import MpcContext, MpcWorkspace
-        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
-        mwc = MpcWorkspace (mpc_ctx)
-
-        mwc.generate ()
-        mwc.build ()
+        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env = ctx.env)
+        return MpcWorkspace (mpc_ctx)
 
     #
     # Build the XSC project.
@@ -121,13 +136,21 @@ class XscProject (Project):
         workspace = path.join (XSC_ROOT, 'XSC.mwc')
 
         # Generate the workspace
-        features = 'xerces3=1,boost=1,exceptions=1'
-
-        if ctx.versioned_namespace:
-            features += ',versioned_namespace=1'
+        features = self.get_features (ctx)
 
         from ..MpcWorkspace import MpcContext, MpcWorkspace
-        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True)
+        mpc_ctx = MpcContext (workspace, ctx.build_type, ctx.config, ctx.threads, features, True, env = ctx.env)
         mwc = MpcWorkspace (mpc_ctx)
 
         mwc.clean ()
+
+    #
+    # Get the features used to build the project
+    #
+    def get_features (self, ctx):
+        features = 'xerces3=1,boost=1,exceptions=1'
+
+        if ctx.versioned_namespace:
+            features += ',versioned_namespace=1'
+
+        return features
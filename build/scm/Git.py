@@ -14,8 +14,33 @@ import os
 import subprocess
 import logging
 
+from .. import Telemetry
+
+#
+# Default clone options used by checkout (). These are set once from the
+# command-line via configure () before any projects are downloaded.
+#
+__options__ = {'shallow' : False,
+               'filter' : None,
+               'jobs' : None,
+               'mirror_dir' : None}
+
+#
+# Configure the default clone options for all checkouts.
+#
+# @param[in]        shallow     Only clone the pinned tag/branch, without history
+# @param[in]        filter      Partial clone filter (e.g., blob:none)
+# @param[in]        jobs        Number of submodules to fetch in parallel
+# @param[in]        mirror_dir  Location of the local mirrors (optional)
+#
+def configure (shallow=False, filter=None, jobs=None, mirror_dir=None):
+  __options__['shallow'] = shallow
+  __options__['filter'] = filter
+  __options__['jobs'] = jobs
+  __options__['mirror_dir'] = mirror_dir
+
 #
-# Utility function for executing an SVN checkout
+# Utility function for executing a Git checkout
 #
 # @param[in]        url         Location of the repo
 # @param[in]        location    Sandbox of the checkout
@@ -23,8 +48,12 @@ import logging
 # @param[in]        password    Password for checkout, if applicable
 # @param[in]        branch      Branch to checkout
 # @param[in]        tag         Tag to checkout
+# @param[in]        shallow     Shallow clone, only if a branch or tag is pinned
+# @param[in]        filter      Partial clone filter (e.g., blob:none)
+# @param[in]        jobs        Number of submodules to fetch in parallel
 #
-def checkout (url, location, username=None, password=None, branch=None, tag=None):
+def checkout (url, location, username=None, password=None, branch=None, tag=None,
+              shallow=None, filter=None, jobs=None):
   from os import path
   from urllib.parse import urlparse, urlunparse
 
@@ -48,6 +77,17 @@ def checkout (url, location, username=None, password=None, branch=None, tag=None
     parsed_url[1] = "%s@%s" (prepend_string, parsed_url[1])
     url = urlunparse (parsed_url)
 
+  if shallow is None:
+    shallow = __options__['shallow']
+
+  if filter is None:
+    filter = __options__['filter']
+
+  if jobs is None:
+    jobs = __options__['jobs']
+
+  supported = True
+
   if tag:
     supported = supports_tag_checkout ()
 
@@ -56,17 +96,292 @@ def checkout (url, location, username=None, password=None, branch=None, tag=None
     cmd.extend (['--branch', branch])
   elif tag and supported:
     cmd.extend (['--branch', tag])
-  cmd.extend ([url, location])
-  subprocess.check_call (cmd)
+
+  # A shallow clone is only possible when the branch or tag is known
+  # at clone time. Otherwise, we need the history to locate the tag.
+  if shallow and (branch or (tag and supported)):
+    cmd.extend (['--depth', '1', '--shallow-submodules'])
+
+  if filter:
+    cmd.append ('--filter=%s' % filter)
+
+  if jobs:
+    cmd.extend (['--jobs', str (jobs)])
+
+  # Clone from the local mirror, if there is one. The submodules are
+  # redirected to their mirrors as well.
+  mirror_dir = __options__['mirror_dir']
+  mirror = None
+
+  if mirror_dir is not None:
+    mirror = mirror_location (url, mirror_dir)
+
+    if path.exists (mirror):
+      logging.getLogger ().info ('cloning {0} from mirror {1}'.format (url, mirror))
+      cmd = ['git'] + mirror_config (mirror_dir, shallow or bool (filter)) + cmd[1:]
+    else:
+      mirror = None
+
+  if mirror is not None:
+    # Local clones ignore --depth and --filter, so a file:// URL is used
+    # when either one is requested.
+    if shallow or filter:
+      cmd.extend ([file_url (mirror), location])
+    else:
+      cmd.extend ([mirror, location])
+
+    Telemetry.check_call (cmd, phase = 'clone')
+
+    # Point the clone, and its submodules, back at the real repositories.
+    cmd = ["git", "remote", "set-url", "origin", url]
+    Telemetry.check_call (cmd, cwd = location)
+
+    cmd = ["git", "submodule", "--quiet", "sync", "--recursive"]
+    Telemetry.check_call (cmd, cwd = location)
+
+  else:
+    cmd.extend ([url, location])
+    Telemetry.check_call (cmd, phase = 'clone')
 
   if tag and not supported:
     cmd = ["git", "checkout", "tags/%s" % tag]
-    subprocess.check_call (cmd, cwd = location)
+    Telemetry.check_call (cmd, phase = 'checkout', cwd = location)
 
-  # Checkout submodules if there are any
-  cmd = ["git", "submodule", "update", "--init"]
-  subprocess.check_call (cmd, cwd = location)
+    # The submodules cloned above are for the default branch. We need
+    # to update them to match the tag.
+    cmd = ["git", "submodule", "update", "--init", "--recursive"]
+    Telemetry.check_call (cmd, phase = 'submodules', cwd = location)
         
+#
+# Get the key of a repository in the local mirrors. The key is the host
+# and path of the repository so the same mirror is used regardless of the
+# protocol used to access the repository.
+#
+# @param[in]        url         Location of the repo
+#
+def mirror_key (url):
+  import re
+  from urllib.parse import urlparse
+
+  # Handle scp-like locations, e.g., git@github.com:DOCGroup/MPC.git
+  match = re.match ('^(?:[^@/]+@)?([^:/]+):(?!//)(.*)$', url)
+
+  if match is not None and not os.path.isabs (url):
+    host, location = match.groups ()
+  else:
+    parsed = urlparse (url)
+    host = parsed.hostname or parsed.scheme or 'file'
+    location = parsed.path
+
+  parts = [part for part in location.split ('/') if part not in ('', '.', '..')]
+  return '/'.join ([host] + parts)
+
+#
+# Get the location of the local mirror for a repository.
+#
+# @param[in]        url         Location of the repo
+# @param[in]        mirror_dir  Location of the local mirrors
+#
+def mirror_location (url, mirror_dir):
+  return os.path.join (os.path.abspath (mirror_dir), 'git', *mirror_key (url).split ('/'))
+
+#
+# Convert a local path to a file:// URL.
+#
+# @param[in]        location    Local path
+#
+def file_url (location):
+  location = os.path.abspath (location).replace (os.sep, '/')
+
+  if not location.startswith ('/'):
+    location = '/' + location
+
+  return 'file://' + location
+
+#
+# Resolve the URL of a submodule. Relative URLs are resolved against the
+# URL of the superproject.
+#
+# @param[in]        url         Location of the superproject
+# @param[in]        submodule   URL of the submodule
+#
+def resolve_submodule_url (url, submodule):
+  if not (submodule.startswith ('./') or submodule.startswith ('../')):
+    return submodule
+
+  base = url.rstrip ('/')
+
+  for part in submodule.split ('/'):
+    if part == '..':
+      # Remove the last component of the path, which may be separated by
+      # a colon in scp-like locations.
+      index = max (base.rfind ('/'), base.rfind (':'))
+      base = base[:index]
+    elif part != '.':
+      base = base + '/' + part
+
+  return base
+
+#
+# Get the URLs of the submodules of a repository, as defined by
+# the .gitmodules file on its HEAD.
+#
+# @param[in]        location    Location of the repo
+#
+def submodule_urls (location):
+  cmd = ["git", "config", "--blob", "HEAD:.gitmodules", "--get-regexp", "^submodule\\..*\\.url$"]
+  p = subprocess.Popen (cmd, cwd = location, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+  output = p.communicate ()[0]
+
+  if p.returncode != 0:
+    return []
+
+  return [line.split (None, 1)[1] for line in output.decode ().splitlines () if len (line.split (None, 1)) == 2]
+
+#
+# Get the files in a checkout that are not tracked by the repository, e.g.,
+# the files generated when building in the source tree. Directories that
+# are repositories of their own, such as another project checked out inside
+# this one, are not included.
+#
+# @param[in]        location    Location of the checkout
+# @return           Paths of the files, relative to the checkout
+#
+def untracked_files (location):
+  cmd = ["git", "status", "--porcelain", "-z", "--ignored", "--untracked-files=normal"]
+  p = subprocess.Popen (cmd, cwd = location, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+  output = p.communicate ()[0]
+
+  if p.returncode != 0:
+    return []
+
+  files = []
+
+  for entry in output.decode ().split ('\0'):
+    if not (entry.startswith ('?? ') or entry.startswith ('!! ')):
+      continue
+
+    name = entry[3:]
+
+    if name.endswith ('/') and os.path.exists (os.path.join (location, name, '.git')):
+      continue
+
+    files.append (name.rstrip ('/'))
+
+  return files
+
+#
+# Read the index of the local mirrors. The index maps the key of each
+# mirror to the URLs used to access it.
+#
+# @param[in]        mirror_dir  Location of the local mirrors
+#
+def read_mirror_index (mirror_dir):
+  import json
+
+  filename = os.path.join (mirror_dir, 'git', 'mirrors.json')
+
+  if not os.path.exists (filename):
+    return {}
+
+  with open (filename, 'r') as index_file:
+    return json.load (index_file)
+
+#
+# Write the index of the local mirrors.
+#
+# @param[in]        mirror_dir  Location of the local mirrors
+# @param[in]        index       Index of the local mirrors
+#
+def write_mirror_index (mirror_dir, index):
+  import json
+
+  filename = os.path.join (mirror_dir, 'git', 'mirrors.json')
+
+  with open (filename + '.tmp', 'w') as index_file:
+    json.dump (index, index_file, indent = 2, sort_keys = True)
+
+  os.replace (filename + '.tmp', filename)
+
+#
+# Get the git configuration that redirects the known repositories to their
+# local mirrors. Repositories that are not mirrored are still accessed
+# over the network.
+#
+# @param[in]        mirror_dir  Location of the local mirrors
+# @param[in]        use_url     Use file:// URLs for the mirrors
+#
+def mirror_config (mirror_dir, use_url=False):
+  config = ['-c', 'protocol.file.allow=always']
+
+  for key, urls in sorted (read_mirror_index (mirror_dir).items ()):
+    mirror = os.path.join (os.path.abspath (mirror_dir), 'git', *key.split ('/'))
+
+    if not os.path.exists (mirror):
+      continue
+
+    if use_url:
+      mirror = file_url (mirror)
+
+    # Accept the common protocols, in addition to the URLs used to
+    # create the mirror.
+    host, location = key.split ('/', 1)
+    aliases = set (urls)
+    aliases.add ('https://%s/%s' % (host, location))
+    aliases.add ('git@%s:%s' % (host, location))
+
+    for alias in sorted (aliases):
+      config.extend (['-c', 'url.%s.insteadOf=%s' % (mirror, alias)])
+
+  return config
+
+#
+# Create or update the local mirror of a repository, and the mirrors of
+# its submodules. Existing mirrors are updated incrementally.
+#
+# @param[in]        url         Location of the repo
+# @param[in]        mirror_dir  Location of the local mirrors
+#
+def update_mirror (url, mirror_dir):
+  index = read_mirror_index (mirror_dir)
+  pending = [url]
+  visited = set ()
+
+  while len (pending) > 0:
+    url = pending.pop (0)
+    key = mirror_key (url)
+
+    if key in visited:
+      continue
+
+    visited.add (key)
+    location = mirror_location (url, mirror_dir)
+
+    if os.path.exists (location):
+      logging.getLogger ().info ('updating mirror of {0}'.format (url))
+      cmd = ["git", "remote", "update", "--prune"]
+      Telemetry.check_call (cmd, phase = 'mirror', cwd = location)
+    else:
+      logging.getLogger ().info ('creating mirror of {0}'.format (url))
+      cmd = ["git", "clone", "--mirror", url, location]
+      Telemetry.check_call (cmd, phase = 'mirror')
+
+    # Let partial clones, i.e., --filter, be served from the mirror.
+    cmd = ["git", "config", "uploadpack.allowFilter", "true"]
+    Telemetry.check_call (cmd, cwd = location)
+
+    urls = index.setdefault (key, [])
+
+    if url not in urls:
+      urls.append (url)
+
+    # Save the index after each mirror so an interrupted update keeps
+    # the mirrors that are already complete.
+    write_mirror_index (mirror_dir, index)
+
+    for submodule in submodule_urls (location):
+      pending.append (resolve_submodule_url (url, submodule))
+
 #
 # Get information about the Git location.
 #
@@ -14,6 +14,28 @@ import os
 import subprocess
 import logging
 
+from .. import Telemetry
+
+#
+# Default checkout options used by checkout (). These are set once from
+# the command-line via configure () before any projects are downloaded.
+#
+__options__ = {'mirror_dir' : None}
+
+#
+# Name of the file in a mirror that holds the path of the mirrored URL
+# below the root of its repository.
+#
+MIRROR_PATH_FILE = 'bczar-path'
+
+#
+# Configure the default checkout options for all checkouts.
+#
+# @param[in]        mirror_dir  Location of the local mirrors (optional)
+#
+def configure (mirror_dir=None):
+  __options__['mirror_dir'] = mirror_dir
+
 #
 # Utility function for executing an SVN checkout
 #
@@ -29,7 +51,24 @@ def checkout (url, location, username=None, password=None):
     logging.getLogger ().info ('{0} is not an empty directory; skipping download'.format (location))
     return
 
-  cmd = ["svn", "--non-interactive", "--trust-server-cert", "co", url, location]
+  # Checkout from the local mirror, if there is one. The working copy is
+  # then relocated to the real repository.
+  mirror = None
+
+  if __options__['mirror_dir'] is not None:
+    mirror = mirror_location (url, __options__['mirror_dir'])
+
+    if not path.exists (os.path.join (mirror, MIRROR_PATH_FILE)):
+      mirror = None
+
+  if mirror is not None:
+    # svnsync keeps the paths relative to the root of the repository, so
+    # the URL is mirrored below the root of the mirror.
+    logging.getLogger ().info ('checking out {0} from mirror {1}'.format (url, mirror))
+    cmd = ["svn", "--non-interactive", "co", file_url (mirror) + mirror_path (mirror), location]
+
+  else:
+    cmd = ["svn", "--non-interactive", "--trust-server-cert", "co", url, location]
 
   if username is not None:
     cmd.append ("--username")
@@ -39,7 +78,140 @@ def checkout (url, location, username=None, password=None):
     cmd.append ("--password")
     cmd.append (password)
 
-  subprocess.check_call (cmd)
+  Telemetry.check_call (cmd, phase = 'checkout')
+
+  if mirror is not None:
+    cmd = ["svn", "--non-interactive", "--trust-server-cert", "relocate", url]
+
+    if username is not None:
+      cmd.extend (["--username", username])
+
+    if password is not None:
+      cmd.extend (["--password", password])
+
+    Telemetry.check_call (cmd, cwd = location)
+
+#
+# Get the location of the local mirror for a repository. Since svnsync
+# mirrors the path of the URL, each URL has its own mirror.
+#
+# @param[in]        url         Location of the repo
+# @param[in]        mirror_dir  Location of the local mirrors
+#
+def mirror_location (url, mirror_dir):
+  from urllib.parse import urlparse
+
+  parsed = urlparse (url)
+  parts = [part for part in parsed.path.split ('/') if part not in ('', '.', '..')]
+
+  return os.path.join (os.path.abspath (mirror_dir), 'svn', parsed.hostname or 'file', *parts)
+
+#
+# Get the path of the mirrored URL below the root of a mirror, e.g.,
+# /xerces/c/trunk. The path is recorded after the mirror is first synced.
+#
+# @param[in]        mirror      Location of the mirror
+#
+def mirror_path (mirror):
+  with open (os.path.join (mirror, MIRROR_PATH_FILE), 'r') as path_file:
+    return path_file.read ().strip ()
+
+#
+# Get an item of information about a repository, e.g., its UUID.
+#
+# @param[in]        url         Location of the repo
+# @param[in]        item        Name of the item (see svn info --show-item)
+# @param[in]        username    Username for svn, if applicable
+# @param[in]        password    Password for svn, if applicable
+#
+def info_item (url, item, username=None, password=None):
+  cmd = ["svn", "--non-interactive", "--trust-server-cert", "info", "--show-item", item, url]
+
+  if username is not None:
+    cmd.extend (["--username", username])
+
+  if password is not None:
+    cmd.extend (["--password", password])
+
+  return subprocess.check_output (cmd).decode ().strip ()
+
+#
+# Convert a local path to a file:// URL.
+#
+# @param[in]        location    Local path
+#
+def file_url (location):
+  location = os.path.abspath (location).replace (os.sep, '/')
+
+  if not location.startswith ('/'):
+    location = '/' + location
+
+  return 'file://' + location
+
+#
+# Create or update the local mirror of a repository using svnsync. The
+# mirror is a local repository that can be checked out via file://.
+#
+# @param[in]        url         Location of the repo
+# @param[in]        mirror_dir  Location of the local mirrors
+# @param[in]        username    Username for svn, if applicable
+# @param[in]        password    Password for svn, if applicable
+#
+def update_mirror (url, mirror_dir, username=None, password=None):
+  import sys
+
+  location = mirror_location (url, mirror_dir)
+  mirror_url = file_url (location)
+
+  credentials = []
+
+  if username is not None:
+    credentials.extend (["--source-username", username])
+
+  if password is not None:
+    credentials.extend (["--source-password", password])
+
+  if not os.path.exists (location):
+    logging.getLogger ().info ('creating mirror of {0}'.format (url))
+    os.makedirs (location)
+
+    cmd = ["svnadmin", "create", location]
+    Telemetry.check_call (cmd)
+
+    # svnsync needs to change the revision properties of the mirror.
+    if sys.platform == 'win32':
+      hook = os.path.join (location, 'hooks', 'pre-revprop-change.bat')
+      content = '@exit 0\n'
+    else:
+      hook = os.path.join (location, 'hooks', 'pre-revprop-change')
+      content = '#!/bin/sh\nexit 0\n'
+
+    with open (hook, 'w') as hook_file:
+      hook_file.write (content)
+
+    os.chmod (hook, 0o755)
+
+    cmd = ["svnsync", "--non-interactive", "--trust-server-cert", "init", mirror_url, url] + credentials
+    Telemetry.check_call (cmd)
+
+  else:
+    logging.getLogger ().info ('updating mirror of {0}'.format (url))
+
+  cmd = ["svnsync", "--non-interactive", "--trust-server-cert", "sync", mirror_url] + credentials
+  Telemetry.check_call (cmd, phase = 'mirror')
+
+  # The path of the URL is recorded after the first sync completes, which
+  # marks the mirror as ready for checkouts.
+  if not os.path.exists (os.path.join (location, MIRROR_PATH_FILE)):
+    # The mirror must have the UUID of the source repository, otherwise
+    # checkouts from the mirror cannot be relocated to the source.
+    cmd = ["svnadmin", "setuuid", location, info_item (url, 'repos-uuid', username, password)]
+    Telemetry.check_call (cmd)
+
+    relative_url = info_item (url, 'relative-url', username, password)
+
+    with open (os.path.join (location, MIRROR_PATH_FILE), 'w') as path_file:
+      path_file.write (relative_url.lstrip ('^') + '\n')
         
 #
 # Get information about the SVN location.